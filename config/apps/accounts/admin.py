@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 from django.contrib.auth.forms import UserChangeForm, UserCreationForm
 from django.utils.translation import gettext_lazy as _
 
-from .models import User
+from .models import RevokedToken, User
 
 # Register your models here.
 
@@ -77,3 +77,11 @@ class UserAdmin(DjangoUserAdmin):
         ),
     )
     readonly_fields = ('last_login', 'date_joined')
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ('jti', 'user', 'revoked_at', 'expires_at')
+    search_fields = ('jti', 'user__email')
+    autocomplete_fields = ('user',)
+    ordering = ('-revoked_at',)
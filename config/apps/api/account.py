@@ -2,6 +2,7 @@ import graphene
 
 from apps.organizations.models import OrganizationMember
 
+from .query_budget import query_budget
 from .types import OrganizationMemberType, OrganizationType, UserType
 
 
@@ -14,6 +15,7 @@ class AccountType(graphene.ObjectType):
 class AccountQuery(graphene.ObjectType):
     account = graphene.Field(AccountType, required=True)
 
+    @query_budget(2)
     def resolve_account(self, info):
         user = info.context.user
 
@@ -1,24 +1,45 @@
+from functools import partial
+
 from django.core.exceptions import ValidationError
 from graphql import GraphQLError
 import graphene
 
+from apps.core.pubsub import get_broker
 from apps.organizations.models import OrganizationMember
+from apps.tasks import events as task_events
 from apps.tasks import selectors as task_selectors
 from apps.tasks import services as task_services
 from apps.tasks.models import Task, TaskComment
 
 from .common import require_org_permission
-from .types import TaskCommentType
+from .optimizer import optimize_queryset
+from .pagination import legacy_list_field, connection_field, resolve_connection
+from .query_budget import query_budget
+from .subscriptions import EventStream, database_sync_to_async, load_once
+from .types import TaskCommentConnection, TaskCommentType
 
 
 class CommentsQuery(graphene.ObjectType):
-    task_comments = graphene.List(TaskCommentType, task_id=graphene.ID(required=True), required=True)
+    task_comments = legacy_list_field(
+        TaskCommentType,
+        connection_name='taskCommentsConnection',
+        task_id=graphene.ID(required=True),
+    )
+    task_comments_connection = connection_field(TaskCommentConnection, task_id=graphene.ID(required=True))
     task_comment = graphene.Field(TaskCommentType, id=graphene.ID(required=True))
 
+    @query_budget(1)
     def resolve_task_comments(self, info, task_id: str):
         org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_READ)
-        return task_selectors.list_task_comments(organization=org, task_id=task_id)
+        return optimize_queryset(task_selectors.list_task_comments(organization=org, task_id=task_id), info)
+
+    @query_budget(1)
+    def resolve_task_comments_connection(self, info, task_id: str, **page):
+        org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_READ)
+        queryset = task_selectors.list_task_comments(organization=org, task_id=task_id)
+        return resolve_connection(TaskCommentConnection, queryset, info, descending=False, **page)
 
+    @query_budget(2)
     def resolve_task_comment(self, info, id: str):
         try:
             org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_READ)
@@ -35,6 +56,7 @@ class CreateTaskComment(graphene.Mutation):
     comment = graphene.Field(TaskCommentType, required=True)
 
     @classmethod
+    @query_budget(3)
     def mutate(cls, root, info, task_id: str, content: str):
         try:
             org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_WRITE)
@@ -61,6 +83,7 @@ class UpdateTaskComment(graphene.Mutation):
     comment = graphene.Field(TaskCommentType, required=True)
 
     @classmethod
+    @query_budget(4)
     def mutate(cls, root, info, id: str, content: str):
         try:
             org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_WRITE)
@@ -85,6 +108,7 @@ class DeleteTaskComment(graphene.Mutation):
     ok = graphene.Boolean(required=True)
 
     @classmethod
+    @query_budget(3)
     def mutate(cls, root, info, id: str):
         try:
             org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_WRITE)
@@ -98,3 +122,30 @@ class CommentsMutation(graphene.ObjectType):
     create_task_comment = CreateTaskComment.Field()
     update_task_comment = UpdateTaskComment.Field()
     delete_task_comment = DeleteTaskComment.Field()
+
+
+class CommentsSubscription(graphene.ObjectType):
+    comment_added = graphene.Field(TaskCommentType, task_id=graphene.ID(required=True), required=True)
+
+    async def subscribe_comment_added(self, info, task_id: str):
+        org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_READ)
+        try:
+            await database_sync_to_async(task_selectors.get_task)(organization=org, task_id=task_id)
+        except Task.DoesNotExist as exc:
+            raise GraphQLError('Task not found') from exc
+
+        async def handle(message):
+            if message.data['task_id'] != task_id:
+                return None
+            comment = await load_once(message, 'comment', partial(_load_comment, message.data['comment_id']))
+            if comment is None:
+                return None
+            info.context.loaders = None
+            return comment
+
+        subscription = get_broker().subscribe(task_events.comment_channel(organization_id=org.id))
+        return EventStream(subscription, handle)
+
+
+def _load_comment(comment_id: str) -> TaskComment | None:
+    return TaskComment.objects.select_related('task__project', 'author').filter(id=comment_id).first()
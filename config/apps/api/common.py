@@ -6,14 +6,14 @@ from apps.organizations.selectors import require_permission as require_permissio
 
 def get_active_organization(info):
     organization = getattr(info.context, 'active_organization', None)
-    if organization is None:
+    if not organization:
         raise GraphQLError('X-Organization-ID header required')
     return organization
 
 
 def get_membership(info):
     membership = getattr(info.context, 'membership', None)
-    if membership is None:
+    if not membership:
         raise GraphQLError('Invalid organization')
     return membership
 
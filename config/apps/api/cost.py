@@ -0,0 +1,142 @@
+from django.conf import settings
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    VariableNode,
+    get_named_type,
+    get_nullable_type,
+    is_composite_type,
+    is_list_type,
+)
+from graphql.utilities import type_from_ast
+
+PAGE_SIZE_ARGUMENTS = ('first', 'last')
+
+
+class QueryCostError(GraphQLError):
+    pass
+
+
+class QueryCost:
+    def __init__(self, *, cost: int, depth: int):
+        self.cost = cost
+        self.depth = depth
+
+
+def analyze(schema, document, operation_ast, variables) -> QueryCost:
+    """Estimate the worst-case cost of ``operation_ast`` without executing it.
+
+    Every selected object or list field costs one unit (scalars cost nothing)
+    unless ``GRAPHQL_FIELD_COSTS`` prices it, multiplied by the number of
+    parents it can be resolved for. Lists are assumed to return
+    ``first``/``last`` rows when the field is paginated and
+    ``GRAPHQL_MAX_PAGE_SIZE`` rows otherwise.
+    """
+    analyzer = _Analyzer(schema, document, variables or {})
+    root_type = schema.get_root_type(operation_ast.operation)
+    cost, depth = analyzer.selection_set(root_type, operation_ast.selection_set, paginated=False)
+    return QueryCost(cost=cost, depth=depth)
+
+
+def check_query_cost(schema, document, operation_ast, variables, *, organization) -> QueryCost:
+    result = analyze(schema, document, operation_ast, variables)
+
+    if result.depth > settings.GRAPHQL_MAX_QUERY_DEPTH:
+        raise QueryCostError(
+            f'Query depth {result.depth} exceeds the maximum of {settings.GRAPHQL_MAX_QUERY_DEPTH}',
+            extensions={'code': 'QUERY_TOO_DEEP', 'depth': result.depth, 'maxDepth': settings.GRAPHQL_MAX_QUERY_DEPTH},
+        )
+
+    budget = get_cost_budget(organization=organization)
+    if result.cost > budget:
+        raise QueryCostError(
+            f'Query cost {result.cost} exceeds the budget of {budget}',
+            extensions={'code': 'QUERY_TOO_COMPLEX', 'cost': result.cost, 'budget': budget},
+        )
+    return result
+
+
+def get_cost_budget(*, organization) -> int:
+    budgets = settings.GRAPHQL_ORGANIZATION_COST_BUDGETS
+    if budgets and organization:
+        return int(budgets.get(str(organization.id), settings.GRAPHQL_MAX_QUERY_COST))
+    return settings.GRAPHQL_MAX_QUERY_COST
+
+
+class _Analyzer:
+    def __init__(self, schema, document, variables: dict):
+        self.schema = schema
+        self.variables = variables
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+
+    def selection_set(self, parent_type, selection_set, *, paginated: bool) -> tuple[int, int]:
+        cost = 0
+        depth = 0
+        for field_node, field_parent in self._fields(parent_type, selection_set):
+            field_cost, field_depth = self.field(field_parent, field_node, paginated=paginated)
+            cost += field_cost
+            depth = max(depth, field_depth)
+        return cost, depth
+
+    def field(self, parent_type, node: FieldNode, *, paginated: bool) -> tuple[int, int]:
+        name = node.name.value
+        if name.startswith('__'):
+            return 0, 0
+
+        field_def = parent_type.fields.get(name)
+        if field_def is None:
+            return 0, 1
+        own_cost = settings.GRAPHQL_FIELD_COSTS.get(f'{parent_type.name}.{name}')
+        if not is_composite_type(get_named_type(field_def.type)):
+            return own_cost or 0, 1
+
+        is_page = any(argument in field_def.args for argument in PAGE_SIZE_ARGUMENTS)
+        if is_page:
+            multiplier = self._page_size(node)
+        elif is_list_type(get_nullable_type(field_def.type)) and not paginated:
+            multiplier = settings.GRAPHQL_MAX_PAGE_SIZE
+        else:
+            multiplier = 1
+
+        child_cost, child_depth = self.selection_set(
+            get_named_type(field_def.type),
+            node.selection_set,
+            paginated=is_page or (paginated and not is_list_type(get_nullable_type(field_def.type))),
+        )
+        return (1 if own_cost is None else own_cost) + multiplier * child_cost, 1 + child_depth
+
+    def _page_size(self, node: FieldNode) -> int:
+        for argument in node.arguments or ():
+            if argument.name.value not in PAGE_SIZE_ARGUMENTS:
+                continue
+            value = argument.value
+            if isinstance(value, VariableNode):
+                value = self.variables.get(value.name.value)
+            elif isinstance(value, IntValueNode):
+                value = int(value.value)
+            if isinstance(value, int) and 0 <= value <= settings.GRAPHQL_MAX_PAGE_SIZE:
+                return value
+        return settings.GRAPHQL_MAX_PAGE_SIZE
+
+    def _fields(self, parent_type, selection_set):
+        if selection_set is None:
+            return
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield selection, parent_type
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = type_from_ast(self.schema, selection.type_condition)
+                yield from self._fields(fragment_type, selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments[selection.name.value]
+                yield from self._fields(type_from_ast(self.schema, fragment.type_condition), fragment.selection_set)
@@ -0,0 +1,39 @@
+import hashlib
+import math
+
+from django.conf import settings
+from graphql import parse, validate
+from graphene_django.settings import graphene_settings
+
+from apps.core.cache import LRUCache
+
+
+_documents = LRUCache(max_entries=settings.GRAPHQL_DOCUMENT_CACHE_MAX_ENTRIES, ttl_seconds=math.inf)
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def get_validated_document(schema, query: str, validation_rules=None):
+    """Return ``(document, errors)``; documents that validate cleanly are parsed and validated once per process."""
+    key = query_hash(query)
+    document = _documents.get(key)
+    if document is not None:
+        return document, []
+
+    try:
+        document = parse(query)
+    except Exception as exc:
+        return None, [exc]
+
+    errors = validate(schema, document, validation_rules, graphene_settings.MAX_VALIDATION_ERRORS)
+    if errors:
+        return None, errors
+
+    _documents.set(key, document)
+    return document, []
+
+
+def clear() -> None:
+    _documents.clear()
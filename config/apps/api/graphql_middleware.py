@@ -1,5 +1,8 @@
+from django.db.models import Model, QuerySet
 from graphql import GraphQLError
 
+from .loaders import get_loaders
+
 
 class AuthRequiredMiddleware:
     def resolve(self, next, root, info, **args):
@@ -15,23 +18,31 @@ class AuthRequiredMiddleware:
         if getattr(request, 'auth_error', None):
             raise GraphQLError('Invalid token')
 
-        if getattr(request, 'jwt_payload', None) is None:
+        if not getattr(request, 'jwt_payload', None):
             raise GraphQLError('Authentication required')
 
         user = getattr(request, 'user', None)
         if user is None or not user.is_authenticated:
             raise GraphQLError('Authentication required')
 
-        if root_field not in {'onboard', 'me', 'account'}:
+        if root_field not in {'onboard', 'switchOrganization', 'logout', 'me', 'account'}:
             if getattr(request, 'org_error', None):
                 raise GraphQLError('Invalid organization')
 
-            if getattr(request, 'active_organization', None) is None:
+            if not getattr(request, 'active_organization', None):
                 raise GraphQLError('X-Organization-ID header required')
 
         return next(root, info, **args)
 
 
+class LoaderMiddleware:
+    def resolve(self, next, root, info, **args):
+        result = next(root, info, **args)
+        if isinstance(result, QuerySet) or (isinstance(result, list) and result and isinstance(result[0], Model)):
+            return get_loaders(info).track(result)
+        return result
+
+
 def _get_root_field_name(path) -> str:
     while getattr(path, 'prev', None) is not None:
         path = path.prev
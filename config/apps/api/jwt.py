@@ -1,4 +1,5 @@
 import time
+import uuid
 
 import jwt
 from django.conf import settings
@@ -8,17 +9,36 @@ JWT_ALGORITHM = 'HS256'
 
 
 def create_access_token(*, user) -> str:
+    payload = _base_claims(user=user, ttl_seconds=settings.JWT_ACCESS_TOKEN_TTL_SECONDS)
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+def create_organization_access_token(*, user, membership, epoch) -> str:
+    payload = _base_claims(user=user, ttl_seconds=settings.JWT_ORGANIZATION_TOKEN_TTL_SECONDS)
+    payload.update(
+        {
+            'org': str(membership.organization_id),
+            'mid': str(membership.pk),
+            'role': membership.role,
+            'perm': membership.permission_mask,
+            'epoch': list(epoch),
+        }
+    )
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+def decode_access_token(*, token: str) -> dict:
+    return jwt.decode(token, settings.JWT_SECRET, algorithms=[JWT_ALGORITHM])
+
+
+def _base_claims(*, user, ttl_seconds: int) -> dict:
     now = int(time.time())
-    payload = {
+    return {
         'sub': str(user.pk),
         'email': user.email,
         'name': user.get_full_name() or user.email,
         'iat': now,
-        'exp': now + settings.JWT_ACCESS_TOKEN_TTL_SECONDS,
+        'exp': now + ttl_seconds,
         'typ': 'access',
+        'jti': uuid.uuid4().hex,
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=JWT_ALGORITHM)
-
-
-def decode_access_token(*, token: str) -> dict:
-    return jwt.decode(token, settings.JWT_SECRET, algorithms=[JWT_ALGORITHM])
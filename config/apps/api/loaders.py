@@ -0,0 +1,93 @@
+from collections import defaultdict
+
+
+class LoaderRegistry:
+    """Per-request batching of relation lookups.
+
+    Instances returned together (a list resolver's rows, or the rows of one
+    batched lookup) are tracked as siblings. The first relation lookup on any
+    of them fetches the relation for all siblings with a single ``IN`` query.
+    Loaded rows are kept in a per-model identity map for the whole request.
+    """
+
+    def __init__(self):
+        self._siblings: dict[int, list] = {}
+        self._identity = defaultdict(dict)
+        self._reverse = defaultdict(dict)
+        self._computed = defaultdict(dict)
+
+    def track(self, instances) -> list:
+        instances = list(instances)
+        for instance in instances:
+            self._siblings.setdefault(id(instance), instances)
+        return instances
+
+    def load(self, instance, field_name: str):
+        field = instance._meta.get_field(field_name)
+        siblings = self._siblings.get(id(instance), [instance])
+
+        if field.is_cached(instance):
+            value = field.get_cached_value(instance)
+            if value is not None and id(value) not in self._siblings:
+                self.track(
+                    cached
+                    for cached in (field.get_cached_value(s) for s in siblings if field.is_cached(s))
+                    if cached is not None
+                )
+            return value
+
+        key = getattr(instance, field.attname)
+        if key is None:
+            return None
+
+        identity = self._identity[field.related_model]
+        missing = {
+            getattr(sibling, field.attname)
+            for sibling in siblings
+            if not field.is_cached(sibling)
+        } - identity.keys() - {None}
+        if missing:
+            # Same manager Django uses for forward relation access.
+            for obj in self.track(field.related_model._base_manager.filter(pk__in=missing)):
+                identity[obj.pk] = obj
+
+        for sibling in siblings:
+            related = identity.get(getattr(sibling, field.attname))
+            if related is not None and not field.is_cached(sibling):
+                field.set_cached_value(sibling, related)
+
+        return identity.get(key)
+
+    def load_many(self, instance, related_name: str) -> list:
+        relation = instance._meta.get_field(related_name)
+        remote_attname = relation.field.attname
+        groups = self._reverse[(relation.related_model, remote_attname)]
+
+        if instance.pk not in groups:
+            siblings = self._siblings.get(id(instance), [instance])
+            missing = {sibling.pk for sibling in siblings} - groups.keys()
+            for key in missing:
+                groups[key] = []
+
+            # Same manager Django uses for reverse relation managers.
+            rows = relation.related_model._default_manager.filter(**{f'{remote_attname}__in': missing})
+            for row in self.track(rows):
+                groups[getattr(row, remote_attname)].append(row)
+
+        return groups[instance.pk]
+
+    def load_computed(self, instance, name: str, fetch):
+        """Return ``fetch(pks)[instance.pk]``, calling ``fetch`` once for the instance and its siblings."""
+        values = self._computed[name]
+        if instance.pk not in values:
+            siblings = self._siblings.get(id(instance), [instance])
+            values.update(fetch({sibling.pk for sibling in siblings} - values.keys()))
+        return values.get(instance.pk)
+
+
+def get_loaders(info) -> LoaderRegistry:
+    request = info.context
+    loaders = getattr(request, 'loaders', None)
+    if loaders is None:
+        loaders = request.loaders = LoaderRegistry()
+    return loaders
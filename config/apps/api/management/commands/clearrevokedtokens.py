@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.api import revocation
+
+
+class Command(BaseCommand):
+    help = 'Delete revocation records of access tokens that have already expired.'
+
+    def handle(self, *args, **options):
+        deleted = revocation.prune_expired()
+        self.stdout.write(f'Deleted {deleted} expired revocation(s).')
@@ -0,0 +1,124 @@
+import random
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import connection
+
+from apps.core.metrics import registry
+
+from .persisted_queries import is_allowlisted
+
+ADHOC_OPERATION = 'adhoc'
+OPERATION_LABELS = ('operation', 'root_field', 'tier')
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+operation_duration = registry.histogram(
+    'graphql_operation_duration_seconds',
+    'Time spent executing a GraphQL operation.',
+    labelnames=OPERATION_LABELS,
+)
+operation_errors = registry.counter(
+    'graphql_operation_errors_total',
+    'GraphQL operations that returned errors.',
+    labelnames=OPERATION_LABELS,
+)
+operation_db_queries = registry.histogram(
+    'graphql_operation_db_queries',
+    'Database queries per sampled GraphQL operation.',
+    labelnames=OPERATION_LABELS,
+    buckets=COUNT_BUCKETS,
+)
+operation_db_duration = registry.histogram(
+    'graphql_operation_db_duration_seconds',
+    'Database time per sampled GraphQL operation.',
+    labelnames=OPERATION_LABELS,
+)
+field_duration = registry.histogram(
+    'graphql_field_duration_seconds',
+    'Resolver time per schema field in sampled GraphQL operations.',
+    labelnames=('field',),
+)
+
+
+class MetricsMiddleware:
+    def resolve(self, next, root, info, **args):
+        if not getattr(info.context, 'metrics_sampled', False):
+            return next(root, info, **args)
+
+        start = time.perf_counter()
+        try:
+            return next(root, info, **args)
+        finally:
+            # Parent type and field name come from the schema, so this label set is bounded.
+            field_duration.observe(time.perf_counter() - start, field=f'{info.parent_type.name}.{info.field_name}')
+
+
+class OperationMetrics:
+    def __init__(self, request, operation_ast, operation_name: str | None, *, query: str):
+        self.request = request
+        self.operation_ast = operation_ast
+        self.operation_name = operation_name
+        self.query = query
+        self.sampled = settings.METRICS_SAMPLE_RATE > 0 and random.random() < settings.METRICS_SAMPLE_RATE
+        self.failed = False
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    def __enter__(self):
+        self.request.metrics_sampled = self.sampled
+        self._db = connection.execute_wrapper(self._record_query) if self.sampled else nullcontext()
+        self._db.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        self._db.__exit__(exc_type, exc, tb)
+        self.request.metrics_sampled = False
+
+        labels = self._labels()
+        operation_duration.observe(elapsed, **labels)
+        if self.failed:
+            operation_errors.inc(**labels)
+        if self.sampled:
+            operation_db_queries.observe(self.queries, **labels)
+            operation_db_duration.observe(self.db_seconds, **labels)
+        return False
+
+    def _record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - start
+
+    def _labels(self) -> dict:
+        operation_ast = self.operation_ast
+        root_field = ''
+        if operation_ast is not None and operation_ast.selection_set.selections:
+            selection = operation_ast.selection_set.selections[0]
+            root_field = getattr(getattr(selection, 'name', None), 'value', '')
+        return {
+            'operation': self._operation_label(),
+            'root_field': root_field,
+            'tier': organization_tier(self.request),
+        }
+
+    def _operation_label(self) -> str:
+        # Clients choose operation names freely; only allowlisted documents may name a series, so junk names
+        # cannot use up METRICS_MAX_LABEL_SETS and fold real operations into the overflow series.
+        if not is_allowlisted(self.query):
+            return ADHOC_OPERATION
+        operation_ast = self.operation_ast
+        return self.operation_name or (operation_ast.name.value if operation_ast and operation_ast.name else '')
+
+
+
+def organization_tier(request) -> str:
+    auth = getattr(request, 'request_auth', None)
+    organization_id = auth.resolved_organization_id if auth is not None else None
+    if organization_id is None:
+        return 'none'
+    return settings.ORGANIZATION_TIERS.get(str(organization_id), 'standard')
@@ -1,9 +1,14 @@
+from functools import cached_property
+
 from django.contrib.auth.models import AnonymousUser
+from django.utils.functional import SimpleLazyObject
 
-from apps.accounts.models import User
-from apps.organizations.models import OrganizationMember
+from apps.organizations.membership_cache import get_cached_membership, get_membership_versions
+from apps.organizations.models import Organization, OrganizationMember
+from apps.organizations.tenancy import tenant_context
 
-from .jwt import decode_access_token
+from .revocation import is_revoked
+from .token_cache import authenticate_token
 
 
 class JWTAuthMiddleware:
@@ -11,49 +16,126 @@ class JWTAuthMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        request.jwt_payload = None
-        request.auth_error = None
-
-        request.org_error = None
-
-        request.membership = None
-        request.active_organization = None
-
         token = _get_bearer_token(request)
         if not token:
+            request.jwt_payload = None
+            request.auth_error = None
+            request.org_error = None
+            request.membership = None
+            request.active_organization = None
+            request.request_auth = None
             return self.get_response(request)
 
+        # Nothing is decoded or queried until a resolver (or AuthRequiredMiddleware) asks for it.
+        auth = RequestAuth(token=token, organization_id=_get_organization_id(request))
+        request.jwt_payload = SimpleLazyObject(lambda: auth.jwt_payload)
+        request.auth_error = SimpleLazyObject(lambda: auth.auth_error)
+        request.user = SimpleLazyObject(lambda: auth.user)
+        request.org_error = SimpleLazyObject(lambda: auth.org_error)
+        request.membership = SimpleLazyObject(lambda: auth.membership)
+        request.active_organization = SimpleLazyObject(lambda: auth.active_organization)
+        request.request_auth = auth
+
+        with tenant_context(lambda: auth.resolved_organization_id):
+            return self.get_response(request)
+
+
+class RequestAuth:
+    def __init__(self, *, token: str, organization_id: str | None):
+        self.token = token
+        self.organization_id = organization_id
+
+    @cached_property
+    def _authentication(self):
         try:
-            payload = decode_access_token(token=token)
-            user = User.objects.get(pk=payload.get('sub'), is_active=True)
+            payload, user = authenticate_token(token=self.token)
         except Exception:
-            request.user = AnonymousUser()
-            request.auth_error = 'invalid_token'
-            return self.get_response(request)
+            return None, AnonymousUser(), 'invalid_token'
 
-        request.user = user
-        request.jwt_payload = payload
+        if is_revoked(payload.get('jti')):
+            return None, AnonymousUser(), 'invalid_token'
+        if payload.get('org') and not _organization_claims_are_current(payload):
+            return None, AnonymousUser(), 'invalid_token'
+        return payload, user, None
 
-        org_id = request.META.get('HTTP_X_ORGANIZATION_ID') or request.headers.get('X-Organization-ID')
-        if org_id:
-            org_id = str(org_id).strip()
-            try:
-                membership = OrganizationMember.objects.select_related('organization').get(
-                    user=user,
-                    organization_id=org_id,
-                )
-                request.membership = membership
-                request.active_organization = membership.organization
-            except Exception:
-                request.membership = None
-                request.active_organization = None
-                request.org_error = 'invalid_organization'
+    @cached_property
+    def _tenant(self):
+        payload, user, _auth_error = self._authentication
+        if payload is None:
+            return None, None
 
-        return self.get_response(request)
+        claimed_org_id = payload.get('org')
+        if claimed_org_id and self.organization_id in {None, claimed_org_id}:
+            return _membership_from_claims(payload, user=user), None
+
+        if self.organization_id is None:
+            return None, None
+
+        try:
+            membership = get_cached_membership(user_id=user.pk, organization_id=self.organization_id)
+        except Exception:
+            return None, 'invalid_organization'
+        return membership, None
+
+    @property
+    def jwt_payload(self):
+        return self._authentication[0]
+
+    @property
+    def user(self):
+        return self._authentication[1]
+
+    @property
+    def auth_error(self):
+        return self._authentication[2]
+
+    @property
+    def membership(self):
+        return self._tenant[0]
+
+    @property
+    def active_organization(self):
+        membership = self.membership
+        return membership.organization if membership is not None else None
+
+    @property
+    def org_error(self):
+        return self._tenant[1]
+
+    @property
+    def resolved_organization_id(self):
+        # Reports the organization only if something already resolved it; never resolves it itself.
+        if '_tenant' not in self.__dict__ or self._tenant[0] is None:
+            return None
+        return self._tenant[0].organization_id
+
+
+def _organization_claims_are_current(payload: dict) -> bool:
+    # The counters live on the shared versions cache, so a change on any worker revokes the token everywhere.
+    epoch = get_membership_versions(user_id=payload.get('sub'), organization_id=payload['org'])
+    return list(epoch) == payload.get('epoch')
+
+
+def _membership_from_claims(payload: dict, *, user) -> OrganizationMember:
+    # Organization-scoped tokens carry everything permission checks need; other
+    # fields are deferred and only loaded if a resolver reads them.
+    organization = Organization.from_db(None, ['id', 'is_active'], [payload['org'], True])
+    membership = OrganizationMember.from_db(
+        None,
+        ['id', 'organization_id', 'user_id', 'role', 'permission_mask', 'is_active'],
+        [payload['mid'], payload['org'], user.pk, payload['role'], payload['perm'], True],
+    )
+    membership.organization = organization
+    membership.user = user
+    return membership
 
 
 def _get_bearer_token(request) -> str | None:
-    auth_header = request.META.get('HTTP_AUTHORIZATION', '').strip()
+    return parse_bearer_token(request.META.get('HTTP_AUTHORIZATION', ''))
+
+
+def parse_bearer_token(auth_header: str) -> str | None:
+    auth_header = auth_header.strip()
     if not auth_header:
         return None
 
@@ -66,3 +148,10 @@ def _get_bearer_token(request) -> str | None:
         return None
 
     return token
+
+
+def _get_organization_id(request) -> str | None:
+    org_id = request.META.get('HTTP_X_ORGANIZATION_ID') or request.headers.get('X-Organization-ID')
+    if not org_id:
+        return None
+    return str(org_id).strip()
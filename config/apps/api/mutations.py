@@ -6,10 +6,13 @@ from graphql import GraphQLError
 import graphene
 
 from apps.accounts.models import User
+from apps.organizations.membership_cache import get_membership_versions
 from apps.organizations.models import Organization, OrganizationMember
 from apps.organizations.services import generate_unique_organization_slug
 
-from .jwt import create_access_token
+from .jwt import create_access_token, create_organization_access_token
+from .query_budget import query_budget
+from .revocation import revoke_token
 from .types import OrganizationMemberType, OrganizationType, UserType
 
 
@@ -24,6 +27,7 @@ class Signup(graphene.Mutation):
     user = graphene.Field(UserType, required=True)
 
     @classmethod
+    @query_budget(1)
     def mutate(cls, root, info, email: str, password: str, first_name: str | None = None, last_name: str | None = None):
         try:
             validate_password(password)
@@ -54,6 +58,7 @@ class Login(graphene.Mutation):
     user = graphene.Field(UserType, required=True)
 
     @classmethod
+    @query_budget(1)
     def mutate(cls, root, info, email: str, password: str):
         user = authenticate(email=email, password=password)
         if user is None:
@@ -65,6 +70,42 @@ class Login(graphene.Mutation):
         return Login(token=token, user=user)
 
 
+class Logout(graphene.Mutation):
+    ok = graphene.Boolean(required=True)
+
+    @classmethod
+    @query_budget(2)
+    def mutate(cls, root, info):
+        revoke_token(payload=info.context.jwt_payload, user=info.context.user)
+        return Logout(ok=True)
+
+
+class SwitchOrganization(graphene.Mutation):
+    class Arguments:
+        organization_id = graphene.ID(required=True)
+
+    token = graphene.String(required=True)
+    membership = graphene.Field(OrganizationMemberType, required=True)
+
+    @classmethod
+    @query_budget(1)
+    def mutate(cls, root, info, organization_id: str):
+        user = info.context.user
+
+        # Read the epoch before the membership so a concurrent change always revokes the token.
+        epoch = get_membership_versions(user_id=user.pk, organization_id=organization_id)
+        try:
+            membership = OrganizationMember.objects.select_related('organization').get(
+                user=user,
+                organization_id=organization_id,
+            )
+        except OrganizationMember.DoesNotExist as exc:
+            raise GraphQLError('Invalid organization') from exc
+
+        token = create_organization_access_token(user=user, membership=membership, epoch=epoch)
+        return SwitchOrganization(token=token, membership=membership)
+
+
 class Onboard(graphene.Mutation):
     class Arguments:
         organization_name = graphene.String(required=True)
@@ -74,6 +115,7 @@ class Onboard(graphene.Mutation):
     membership = graphene.Field(OrganizationMemberType, required=True)
 
     @classmethod
+    @query_budget(3)
     def mutate(
         cls,
         root,
@@ -0,0 +1,107 @@
+import logging
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+
+logger = logging.getLogger(__name__)
+
+
+def optimize_queryset(queryset, info, *, field_nodes=None, required=()):
+    """Restrict ``queryset`` to the columns and relations selected below ``info``'s field.
+
+    Selected forward relations are joined with ``select_related``, reverse
+    relations are prefetched and every other column is deferred. A selected
+    field that does not map onto the model (a custom resolver) keeps all of
+    that model's columns loaded so no resolver triggers a per-row load.
+    The deferred columns are logged and kept on ``queryset.pruned_columns``.
+    """
+    if field_nodes is None:
+        field_nodes = info.field_nodes
+
+    plan = _Plan()
+    plan.only.update(required)
+    _plan_model(info, queryset.model, _selected_fields(info, field_nodes), prefix='', plan=plan)
+    plan.pruned.difference_update(required)
+
+    queryset = _apply(queryset.select_related(None), plan)
+    if plan.pruned:
+        logger.debug('Pruned columns from %s query: %s', queryset.model._meta.label, ', '.join(sorted(plan.pruned)))
+    queryset.pruned_columns = frozenset(plan.pruned)
+    return queryset
+
+
+class _Plan:
+    def __init__(self):
+        self.only: set[str] = set()
+        self.related: list[str] = []
+        self.prefetches: list[Prefetch] = []
+        self.pruned: set[str] = set()
+
+
+def _apply(queryset, plan: _Plan):
+    if plan.related:
+        queryset = queryset.select_related(*plan.related)
+    if plan.prefetches:
+        queryset = queryset.prefetch_related(*plan.prefetches)
+    return queryset.only(*plan.only)
+
+
+def _plan_model(info, model, selections: dict, *, prefix: str, plan: _Plan) -> None:
+    opts = model._meta
+    loaded = {opts.pk.name}
+    load_all = False
+
+    for name, nodes in selections.items():
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            load_all = True
+            continue
+
+        if field.is_relation and field.concrete and (field.many_to_one or field.one_to_one):
+            loaded.add(field.name)
+            plan.related.append(prefix + name)
+            _plan_model(info, field.related_model, _selected_fields(info, nodes), prefix=f'{prefix}{name}__', plan=plan)
+        elif field.is_relation and field.one_to_many:
+            nested = _Plan()
+            _plan_model(info, field.related_model, _selected_fields(info, nodes), prefix='', plan=nested)
+            nested.only.add(field.field.name)
+            related_queryset = _apply(field.related_model._default_manager.all(), nested)
+            plan.prefetches.append(Prefetch(prefix + name, queryset=related_queryset))
+        elif field.concrete:
+            loaded.add(field.name)
+
+    for f in opts.concrete_fields:
+        if load_all or f.name in loaded:
+            plan.only.add(prefix + f.name)
+        else:
+            plan.pruned.add(prefix + f.attname)
+
+
+def selected_field_nodes(info, field_nodes, *, path: tuple[str, ...]) -> list[FieldNode]:
+    for name in path:
+        field_nodes = _selected_fields(info, field_nodes).get(name, [])
+    return field_nodes
+
+
+def _selected_fields(info, field_nodes) -> dict[str, list[FieldNode]]:
+    fields: dict[str, list[FieldNode]] = {}
+    for node in field_nodes:
+        if node.selection_set is not None:
+            _collect(info, node.selection_set.selections, fields)
+    return fields
+
+
+def _collect(info, selections, fields: dict) -> None:
+    for selection in selections:
+        if isinstance(selection, FieldNode):
+            name = selection.name.value
+            if not name.startswith('__'):
+                fields.setdefault(to_snake_case(name), []).append(selection)
+        elif isinstance(selection, InlineFragmentNode):
+            _collect(info, selection.selection_set.selections, fields)
+        elif isinstance(selection, FragmentSpreadNode):
+            _collect(info, info.fragments[selection.name.value].selection_set.selections, fields)
@@ -0,0 +1,72 @@
+import graphene
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from graphql import GraphQLError
+
+from apps.core.pagination import encode_cursor, paginate_keyset
+
+from .loaders import get_loaders
+from .optimizer import optimize_queryset, selected_field_nodes
+
+
+def legacy_list_field(item_type, *, connection_name: str, **kwargs):
+    # Plain list fields predate the connections and still return every row, so existing clients keep working.
+    return graphene.List(
+        item_type,
+        required=True,
+        description=f'Every matching row; use `{connection_name}` to page through them.',
+        deprecation_reason=f'Use `{connection_name}`.',
+        **kwargs,
+    )
+
+
+def connection_field(connection_type, **kwargs):
+    return graphene.Field(
+        connection_type,
+        first=graphene.Int(required=False),
+        after=graphene.String(required=False),
+        last=graphene.Int(required=False),
+        before=graphene.String(required=False),
+        required=True,
+        **kwargs,
+    )
+
+
+def resolve_connection(
+    connection_type,
+    queryset,
+    info,
+    *,
+    descending: bool,
+    first: int | None = None,
+    after: str | None = None,
+    last: int | None = None,
+    before: str | None = None,
+):
+    node_fields = selected_field_nodes(info, info.field_nodes, path=('edges', 'node'))
+    queryset = optimize_queryset(queryset, info, field_nodes=node_fields, required=('created_at',))
+
+    try:
+        page = paginate_keyset(
+            queryset,
+            descending=descending,
+            max_page_size=settings.GRAPHQL_MAX_PAGE_SIZE,
+            first=first,
+            after=after,
+            last=last,
+            before=before,
+        )
+    except ValidationError as exc:
+        raise GraphQLError(' '.join(exc.messages)) from exc
+
+    items = get_loaders(info).track(page.items)
+    edges = [connection_type.Edge(node=item, cursor=encode_cursor(item)) for item in items]
+    return connection_type(
+        edges=edges,
+        page_info=graphene.relay.PageInfo(
+            has_next_page=page.has_next_page,
+            has_previous_page=page.has_previous_page,
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+        ),
+    )
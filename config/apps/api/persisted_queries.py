@@ -0,0 +1,71 @@
+import json
+from functools import cache
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from graphql import GraphQLError
+
+from .documents import query_hash
+
+
+class PersistedQueryError(GraphQLError):
+    pass
+
+
+def resolve_query(*, query: str | None, extensions) -> str | None:
+    """Apply automatic persisted queries and the optional allowlist to an incoming request."""
+    sha256 = _get_sha256(extensions)
+
+    if query:
+        digest = query_hash(query)
+        if sha256 and sha256 != digest:
+            raise PersistedQueryError('provided sha does not match query', extensions={'code': 'INVALID_PERSISTED_QUERY'})
+        if settings.GRAPHQL_ALLOWLIST_ONLY and digest not in _allowlist():
+            raise PersistedQueryError('Unknown operation', extensions={'code': 'OPERATION_NOT_ALLOWED'})
+        if sha256:
+            django_cache.set(_cache_key(digest), query, settings.GRAPHQL_PERSISTED_QUERY_TTL_SECONDS)
+        return query
+
+    if not sha256:
+        return None
+
+    query = _allowlist().get(sha256)
+    if query is None and settings.GRAPHQL_ALLOWLIST_ONLY:
+        raise PersistedQueryError('Unknown operation', extensions={'code': 'OPERATION_NOT_ALLOWED'})
+    if query is None:
+        query = django_cache.get(_cache_key(sha256))
+    if query is None:
+        raise PersistedQueryError('PersistedQueryNotFound', extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'})
+    return query
+
+
+def is_allowlisted(query: str | None) -> bool:
+    return bool(query) and query_hash(query) in _allowlist()
+
+
+def _get_sha256(extensions) -> str | None:
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError as exc:
+            raise PersistedQueryError('Extensions are invalid JSON.') from exc
+    if not isinstance(extensions, dict):
+        return None
+
+    persisted_query = extensions.get('persistedQuery')
+    if not isinstance(persisted_query, dict):
+        return None
+    return persisted_query.get('sha256Hash') or None
+
+
+def _cache_key(sha256: str) -> str:
+    return f'graphql:persisted-query:{sha256}'
+
+
+@cache
+def _allowlist() -> dict[str, str]:
+    # JSON list of operation documents; they are keyed by their sha256 here.
+    if not settings.GRAPHQL_ALLOWLIST_PATH:
+        return {}
+    with open(settings.GRAPHQL_ALLOWLIST_PATH, encoding='utf-8') as fh:
+        return {query_hash(query): query for query in json.load(fh)}
@@ -8,17 +8,30 @@ from apps.projects import services as project_services
 from apps.projects.models import Project
 
 from .common import require_org_permission
-from .types import ProjectType
+from .optimizer import optimize_queryset
+from .pagination import legacy_list_field, connection_field, resolve_connection
+from .query_budget import query_budget
+from .types import ProjectConnection, ProjectType
 
 
 class ProjectsQuery(graphene.ObjectType):
-    projects = graphene.List(ProjectType, required=True)
+    projects = legacy_list_field(ProjectType, connection_name='projectsConnection')
+    projects_connection = connection_field(ProjectConnection)
     project = graphene.Field(ProjectType, id=graphene.ID(required=True))
 
+    # A second query when the selection includes the batched ``taskStats`` aggregate.
+    @query_budget(2)
     def resolve_projects(self, info):
         org, _membership = require_org_permission(info, OrganizationMember.Permission.PROJECTS_READ)
-        return project_selectors.list_projects(organization=org)
+        return optimize_queryset(project_selectors.list_projects(organization=org), info)
 
+    @query_budget(2)
+    def resolve_projects_connection(self, info, **page):
+        org, _membership = require_org_permission(info, OrganizationMember.Permission.PROJECTS_READ)
+        queryset = project_selectors.list_projects(organization=org)
+        return resolve_connection(ProjectConnection, queryset, info, descending=True, **page)
+
+    @query_budget(2)
     def resolve_project(self, info, id: str):
         org, _membership = require_org_permission(info, OrganizationMember.Permission.PROJECTS_READ)
         try:
@@ -35,6 +48,7 @@ class CreateProject(graphene.Mutation):
     project = graphene.Field(ProjectType, required=True)
 
     @classmethod
+    @query_budget(1)
     def mutate(
         cls,
         root,
@@ -63,6 +77,7 @@ class UpdateProject(graphene.Mutation):
     project = graphene.Field(ProjectType, required=True)
 
     @classmethod
+    @query_budget(1)
     def mutate(
         cls,
         root,
@@ -95,6 +110,7 @@ class DeleteProject(graphene.Mutation):
     ok = graphene.Boolean(required=True)
 
     @classmethod
+    @query_budget(2)
     def mutate(cls, root, info, id: str):
         try:
             org, _membership = require_org_permission(info, OrganizationMember.Permission.PROJECTS_DELETE)
@@ -0,0 +1,101 @@
+import logging
+import re
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from graphql import GraphQLResolveInfo
+
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+# Transaction control and subscription notifications are not reads a resolver can batch away.
+_UNCOUNTED_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'SELECT pg_notify(')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(limit: int):
+    """Declare how many SQL queries the decorated root resolver (and everything below it) may run."""
+
+    def decorator(resolver):
+        @wraps(resolver)
+        def wrapper(*args, **kwargs):
+            info = next(arg for arg in args if isinstance(arg, GraphQLResolveInfo))
+            capture = getattr(info.context, 'query_capture', None)
+            if capture is not None:
+                capture.budgets[info.path.key] = wrapper.query_budget
+            return resolver(*args, **kwargs)
+
+        wrapper.query_budget = limit
+        return wrapper
+
+    return decorator
+
+
+class QueryBudgetMiddleware:
+    # Runs inside AuthRequiredMiddleware so lazy authentication queries are not charged to a field.
+    def resolve(self, next, root, info, **args):
+        capture = getattr(info.context, 'query_capture', None)
+        if capture is not None and info.path.prev is None:
+            capture.current = info.path.key
+        return next(root, info, **args)
+
+
+class QueryCapture:
+    def __init__(self, request, operation_ast):
+        self.request = request
+        self.operation_name = operation_ast.name.value if operation_ast.name else '<anonymous>'
+        self.current = None
+        self.budgets: dict[str, int] = {}
+        self.counts: Counter = Counter()
+        self.shapes: Counter = Counter()
+
+    def __enter__(self):
+        if settings.QUERY_BUDGET_MODE == 'off':
+            return self
+        self.request.query_capture = self
+        self._wrapper = connection.execute_wrapper(self._record)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if settings.QUERY_BUDGET_MODE == 'off':
+            return False
+        self._wrapper.__exit__(exc_type, exc, tb)
+        self.request.query_capture = None
+        if exc_type is None:
+            self.check()
+        return False
+
+    def _record(self, execute, sql, params, many, context):
+        if not sql.startswith(_UNCOUNTED_STATEMENTS):
+            self.counts[self.current] += 1
+            self.shapes[_IN_LIST.sub('(%s, ...)', sql)] += 1
+        return execute(sql, params, many, context)
+
+    def violations(self) -> list[str]:
+        problems = [
+            f'{field} ran {self.counts[field]} queries (budget {budget})'
+            for field, budget in self.budgets.items()
+            if self.counts[field] > budget
+        ]
+        problems.extend(
+            f'{count} identical queries: {shape[:200]}'
+            for shape, count in self.shapes.items()
+            if count >= settings.QUERY_BUDGET_REPEAT_THRESHOLD
+        )
+        return problems
+
+    def check(self) -> None:
+        problems = self.violations()
+        if not problems:
+            return
+        message = f'GraphQL operation {self.operation_name} exceeded its query budget: ' + '; '.join(problems)
+        if settings.QUERY_BUDGET_MODE == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
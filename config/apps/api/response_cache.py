@@ -0,0 +1,73 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import quote_etag
+from graphql import FieldNode, OperationType
+
+from apps.organizations.data_versions import get_data_version
+
+from .documents import query_hash
+
+# Root fields whose result depends only on the organization's projects, tasks and comments.
+CACHEABLE_ROOT_FIELDS = frozenset(
+    {
+        'projects',
+        'projectsConnection',
+        'project',
+        'tasks',
+        'tasksConnection',
+        'task',
+        'taskStats',
+        'organizationTaskStats',
+        'taskComments',
+        'taskCommentsConnection',
+        'taskComment',
+    }
+)
+
+
+def get_cache_key(request, operation_ast, *, query: str, variables, operation_name) -> str | None:
+    if operation_ast.operation != OperationType.QUERY or not _is_cacheable(operation_ast):
+        return None
+
+    membership = getattr(request, 'membership', None)
+    if not membership:
+        return None
+
+    organization_id = membership.organization_id
+    raw = json.dumps(
+        [
+            get_data_version(organization_id=organization_id),
+            membership.permission_mask,
+            query_hash(query),
+            operation_name,
+            variables,
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return f'graphql:response:{organization_id}:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+
+def get_etag(data) -> str:
+    # Hashes the body itself: a write the data version missed still changes the tag once the entry is rebuilt.
+    raw = json.dumps(data, sort_keys=True, default=str)
+    return quote_etag(hashlib.sha256(raw.encode()).hexdigest())
+
+
+def load(key: str):
+    return caches[settings.RESPONSE_CACHE_ALIAS].get(key)
+
+
+def store(key: str, data) -> None:
+    caches[settings.RESPONSE_CACHE_ALIAS].set(key, data)
+
+
+def _is_cacheable(operation_ast) -> bool:
+    selections = operation_ast.selection_set.selections
+    if not all(isinstance(selection, FieldNode) for selection in selections):
+        return False
+    names = [selection.name.value for selection in selections if not selection.name.value.startswith('__')]
+    return bool(names) and all(name in CACHEABLE_ROOT_FIELDS for name in names)
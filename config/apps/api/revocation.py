@@ -0,0 +1,103 @@
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.accounts.models import RevokedToken
+from apps.core.bloom import BloomFilter
+from apps.core.cache import LRUCache
+
+from . import token_cache
+
+
+# Revocations written by other processes may commit slightly out of revoked_at order.
+_REFRESH_OVERLAP = datetime.timedelta(seconds=60)
+
+
+class _RevocationFilter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.watermark = None
+        self.refreshed_at = 0.0
+
+    def refresh_if_due(self) -> None:
+        if time.monotonic() - self.refreshed_at < settings.JWT_REVOCATION_REFRESH_SECONDS:
+            return
+
+        with self.lock:
+            if time.monotonic() - self.refreshed_at < settings.JWT_REVOCATION_REFRESH_SECONDS:
+                return
+
+            if self.bloom is None or self.bloom.count >= self.bloom.capacity:
+                self._rebuild()
+            else:
+                recent = RevokedToken.objects.filter(revoked_at__gte=self.watermark - _REFRESH_OVERLAP)
+                self.watermark = _load_into(self.bloom, recent, self.watermark)
+            self.refreshed_at = time.monotonic()
+
+    def add(self, jti: str) -> None:
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self.bloom
+
+    def _rebuild(self) -> None:
+        bloom = BloomFilter(
+            capacity=settings.JWT_REVOCATION_BLOOM_CAPACITY,
+            error_rate=settings.JWT_REVOCATION_BLOOM_ERROR_RATE,
+        )
+        watermark = _load_into(bloom, RevokedToken.objects.filter(expires_at__gt=timezone.now()), timezone.now())
+        # Readers never take the lock, so they must only ever see a fully loaded filter.
+        self.bloom, self.watermark = bloom, watermark
+
+
+def _load_into(bloom: BloomFilter, queryset, watermark: datetime.datetime) -> datetime.datetime:
+    for jti, revoked_at in queryset.values_list('jti', 'revoked_at').iterator():
+        bloom.add(jti)
+        watermark = max(watermark, revoked_at)
+    return watermark
+
+
+_filter = _RevocationFilter()
+_confirmed = LRUCache(max_entries=10000, ttl_seconds=settings.JWT_ACCESS_TOKEN_TTL_SECONDS)
+
+
+def is_revoked(jti: str | None) -> bool:
+    if not jti:
+        return False
+
+    _filter.refresh_if_due()
+    if jti not in _filter:
+        return False
+
+    # Probable hit: confirm against the table so false positives never lock anyone out.
+    if _confirmed.get(jti):
+        return True
+    revoked = RevokedToken.objects.filter(jti=jti).exists()
+    if revoked:
+        _confirmed.set(jti, True)
+    return revoked
+
+
+def prune_expired() -> int:
+    # An expired token is rejected when decoded, so its revocation row is dead weight.
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def revoke_token(*, payload: dict, user) -> None:
+    jti = payload.get('jti')
+    if not jti:
+        return
+
+    expires_at = datetime.datetime.fromtimestamp(payload['exp'], tz=datetime.UTC)
+    RevokedToken.objects.get_or_create(jti=jti, defaults={'user': user, 'expires_at': expires_at})
+
+    _filter.add(jti)
+    _confirmed.set(jti, True)
+    token_cache.invalidate_token(jti=jti)
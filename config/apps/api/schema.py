@@ -1,10 +1,11 @@
 import graphene
 
-from .mutations import Login, Onboard, Signup
+from .mutations import Login, Logout, Onboard, Signup, SwitchOrganization
 from .account import AccountQuery
-from .comments import CommentsMutation, CommentsQuery
+from .comments import CommentsMutation, CommentsQuery, CommentsSubscription
 from .projects import ProjectsMutation, ProjectsQuery
-from .tasks import TasksMutation, TasksQuery
+from .query_budget import query_budget
+from .tasks import TasksMutation, TasksQuery, TasksSubscription
 from .types import OrganizationType, UserType
 
 
@@ -12,17 +13,25 @@ class Query(AccountQuery, ProjectsQuery, TasksQuery, CommentsQuery, graphene.Obj
     me = graphene.Field(UserType, required=True)
     active_organization = graphene.Field(OrganizationType)
 
+    @query_budget(0)
     def resolve_me(self, info):
         return info.context.user
 
+    @query_budget(1)
     def resolve_active_organization(self, info):
-        return getattr(info.context, 'active_organization', None)
+        return getattr(info.context, 'active_organization', None) or None
 
 
 class Mutation(ProjectsMutation, TasksMutation, CommentsMutation, graphene.ObjectType):
     signup = Signup.Field()
     login = Login.Field()
+    logout = Logout.Field()
     onboard = Onboard.Field()
+    switch_organization = SwitchOrganization.Field()
 
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
+class Subscription(TasksSubscription, CommentsSubscription, graphene.ObjectType):
+    pass
+
+
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
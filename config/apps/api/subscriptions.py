@@ -0,0 +1,47 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from apps.core.pubsub import Message, Subscription
+
+
+def database_sync_to_async(func):
+    """Run ``func`` in the shared sync thread, recycling its connection the way a request would."""
+
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(wrapper)
+
+
+async def load_once(message: Message, key: str, load):
+    # Every subscriber receives the same Message, so a row is fetched once per event, not once per connection.
+    if key not in message.memo:
+        message.memo[key] = asyncio.ensure_future(database_sync_to_async(load)())
+    return await asyncio.shield(message.memo[key])
+
+
+class EventStream:
+    """Async iterator over a broker subscription; ``handle`` maps a message to a payload or ``None`` to skip it."""
+
+    def __init__(self, subscription: Subscription, handle):
+        self.subscription = subscription
+        self.handle = handle
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        async for message in self.subscription:
+            payload = await self.handle(message)
+            if payload is not None:
+                return payload
+        raise StopAsyncIteration
+
+    async def aclose(self) -> None:
+        self.subscription.close()
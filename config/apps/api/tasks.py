@@ -1,25 +1,45 @@
+from functools import partial
+
 from django.core.exceptions import ValidationError
 from graphql import GraphQLError
 import graphene
 
+from apps.core.pubsub import get_broker
 from apps.organizations.models import OrganizationMember
+from apps.projects import selectors as project_selectors
 from apps.projects.models import Project
+from apps.tasks import events as task_events
 from apps.tasks import selectors as task_selectors
 from apps.tasks import services as task_services
 from apps.tasks.models import Task
 
 from .common import require_org_permission
-from .types import TaskType
+from .optimizer import optimize_queryset
+from .pagination import legacy_list_field, connection_field, resolve_connection
+from .query_budget import query_budget
+from .subscriptions import EventStream, database_sync_to_async, load_once
+from .types import BulkItemErrorType, TaskChangedEventType, TaskConnection, TaskStatsType, TaskType
 
 
 class TasksQuery(graphene.ObjectType):
-    tasks = graphene.List(TaskType, project_id=graphene.ID(required=False), required=True)
+    tasks = legacy_list_field(TaskType, connection_name='tasksConnection', project_id=graphene.ID(required=False))
+    tasks_connection = connection_field(TaskConnection, project_id=graphene.ID(required=False))
     task = graphene.Field(TaskType, id=graphene.ID(required=True))
+    task_stats = graphene.Field(TaskStatsType, project_id=graphene.ID(required=True), required=True)
+    organization_task_stats = graphene.Field(TaskStatsType, required=True)
 
+    @query_budget(1)
     def resolve_tasks(self, info, project_id: str | None = None):
         org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_READ)
-        return task_selectors.list_tasks(organization=org, project_id=project_id)
+        return optimize_queryset(task_selectors.list_tasks(organization=org, project_id=project_id), info)
+
+    @query_budget(1)
+    def resolve_tasks_connection(self, info, project_id: str | None = None, **page):
+        org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_READ)
+        queryset = task_selectors.list_tasks(organization=org, project_id=project_id)
+        return resolve_connection(TaskConnection, queryset, info, descending=True, **page)
 
+    @query_budget(1)
     def resolve_task(self, info, id: str):
         org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_READ)
         try:
@@ -27,6 +47,16 @@ class TasksQuery(graphene.ObjectType):
         except Task.DoesNotExist as exc:
             raise GraphQLError('Task not found') from exc
 
+    @query_budget(1)
+    def resolve_task_stats(self, info, project_id: str):
+        org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_READ)
+        return task_selectors.get_task_stats(organization=org, project_id=project_id)
+
+    @query_budget(1)
+    def resolve_organization_task_stats(self, info):
+        org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_READ)
+        return task_selectors.get_task_stats(organization=org)
+
 
 class CreateTask(graphene.Mutation):
     class Arguments:
@@ -40,6 +70,7 @@ class CreateTask(graphene.Mutation):
     task = graphene.Field(TaskType, required=True)
 
     @classmethod
+    @query_budget(3)
     def mutate(
         cls,
         root,
@@ -84,6 +115,7 @@ class UpdateTask(graphene.Mutation):
     task = graphene.Field(TaskType, required=True)
 
     @classmethod
+    @query_budget(4)
     def mutate(
         cls,
         root,
@@ -127,6 +159,7 @@ class DeleteTask(graphene.Mutation):
     ok = graphene.Boolean(required=True)
 
     @classmethod
+    @query_budget(3)
     def mutate(cls, root, info, id: str):
         try:
             org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_DELETE)
@@ -136,7 +169,114 @@ class DeleteTask(graphene.Mutation):
         return DeleteTask(ok=True)
 
 
+class BulkCreateTaskInput(graphene.InputObjectType):
+    project_id = graphene.ID(required=True)
+    title = graphene.String(required=True)
+    description = graphene.String(required=False)
+    status = graphene.String(required=False)
+    due_date = graphene.Date(required=False)
+    assignee_email = graphene.String(required=False)
+
+
+class BulkUpdateTaskInput(graphene.InputObjectType):
+    id = graphene.ID(required=True)
+    project_id = graphene.ID(required=False)
+    status = graphene.String(required=False)
+    due_date = graphene.Date(required=False)
+    assignee_email = graphene.String(required=False)
+
+
+def _bulk_errors(result) -> list[BulkItemErrorType]:
+    return [BulkItemErrorType(index=index, id=task_id, message=message) for index, task_id, message in result.errors]
+
+
+class BulkCreateTasks(graphene.Mutation):
+    class Arguments:
+        tasks = graphene.List(graphene.NonNull(BulkCreateTaskInput), required=True)
+
+    tasks = graphene.List(graphene.NonNull(TaskType), required=True)
+    errors = graphene.List(graphene.NonNull(BulkItemErrorType), required=True)
+
+    @classmethod
+    @query_budget(3)
+    def mutate(cls, root, info, tasks: list):
+        org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_WRITE)
+        try:
+            result = task_services.bulk_create_tasks(organization=org, items=[dict(item) for item in tasks])
+        except ValidationError as exc:
+            raise GraphQLError(' '.join(exc.messages)) from exc
+        return BulkCreateTasks(tasks=result.tasks, errors=_bulk_errors(result))
+
+
+class BulkUpdateTasks(graphene.Mutation):
+    class Arguments:
+        tasks = graphene.List(graphene.NonNull(BulkUpdateTaskInput), required=True)
+
+    tasks = graphene.List(graphene.NonNull(TaskType), required=True)
+    errors = graphene.List(graphene.NonNull(BulkItemErrorType), required=True)
+
+    @classmethod
+    @query_budget(7)
+    def mutate(cls, root, info, tasks: list):
+        org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_WRITE)
+        try:
+            result = task_services.bulk_update_tasks(organization=org, items=[dict(item) for item in tasks])
+        except ValidationError as exc:
+            raise GraphQLError(' '.join(exc.messages)) from exc
+        return BulkUpdateTasks(tasks=result.tasks, errors=_bulk_errors(result))
+
+
+class BulkDeleteTasks(graphene.Mutation):
+    class Arguments:
+        ids = graphene.List(graphene.NonNull(graphene.ID), required=True)
+
+    ok = graphene.Boolean(required=True)
+    errors = graphene.List(graphene.NonNull(BulkItemErrorType), required=True)
+
+    @classmethod
+    @query_budget(3)
+    def mutate(cls, root, info, ids: list[str]):
+        org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_DELETE)
+        try:
+            result = task_services.bulk_delete_tasks(organization=org, task_ids=ids)
+        except ValidationError as exc:
+            raise GraphQLError(' '.join(exc.messages)) from exc
+        return BulkDeleteTasks(ok=not result.errors, errors=_bulk_errors(result))
+
+
 class TasksMutation(graphene.ObjectType):
     create_task = CreateTask.Field()
     update_task = UpdateTask.Field()
     delete_task = DeleteTask.Field()
+    bulk_create_tasks = BulkCreateTasks.Field()
+    bulk_update_tasks = BulkUpdateTasks.Field()
+    bulk_delete_tasks = BulkDeleteTasks.Field()
+
+
+class TasksSubscription(graphene.ObjectType):
+    task_changed = graphene.Field(TaskChangedEventType, project_id=graphene.ID(required=True), required=True)
+
+    async def subscribe_task_changed(self, info, project_id: str):
+        org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_READ)
+        try:
+            await database_sync_to_async(project_selectors.get_project)(organization=org, project_id=project_id)
+        except Project.DoesNotExist as exc:
+            raise GraphQLError('Project not found') from exc
+
+        async def handle(message):
+            if message.data['project_id'] != project_id:
+                return None
+            task = await load_once(message, 'task', partial(_load_task, message.data['task_id']))
+            if task is None:
+                return None
+            # Each event is resolved from fresh rows; nothing is carried over from earlier events.
+            info.context.loaders = None
+            return TaskChangedEventType(action=message.data['action'], task=task)
+
+        subscription = get_broker().subscribe(task_events.task_channel(organization_id=org.id))
+        return EventStream(subscription, handle)
+
+
+def _load_task(task_id: str) -> Task | None:
+    # Deleted tasks are still delivered so clients can drop them.
+    return Task.all_objects.select_related('project').filter(id=task_id).first()
@@ -0,0 +1,903 @@
+import asyncio
+import base64
+import datetime
+import hashlib
+import io
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql import parse
+
+from apps.accounts.models import RevokedToken, User
+from apps.api import persisted_queries, revocation, token_cache
+from apps.api.common import require_org_permission
+from apps.api.cost import analyze
+from apps.api.jwt import create_access_token
+from apps.api.loaders import LoaderRegistry
+from apps.api.projects import ProjectsQuery
+from apps.api.query_budget import QueryBudgetExceeded, QueryCapture
+from apps.api.schema import schema
+from apps.api.subscriptions import database_sync_to_async
+from apps.core.metrics import registry as metrics_registry
+from apps.core.pubsub import get_broker
+from apps.organizations.data_versions import get_data_version
+from apps.organizations.models import Organization, OrganizationMember
+from apps.organizations.tenancy import tenant_context
+from apps.projects.models import Project
+from apps.tasks import events as task_events
+from apps.tasks import services as task_services
+from apps.tasks.models import Task
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.token = create_access_token(user=self.user)
+
+    def test_repeated_token_skips_user_lookup(self):
+        token_cache.authenticate_token(token=self.token)
+
+        with self.assertNumQueries(0):
+            payload, user = token_cache.authenticate_token(token=self.token)
+
+        self.assertEqual(payload['sub'], self.user.pk)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, self.user.email)
+
+    def test_deactivating_user_invalidates_cached_token(self):
+        token_cache.authenticate_token(token=self.token)
+
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+
+        with self.assertRaises(User.DoesNotExist):
+            token_cache.authenticate_token(token=self.token)
+
+
+class LazyRequestAuthTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        OrganizationMember.objects.create(organization=self.org, user=self.user, role=OrganizationMember.Role.OWNER)
+        self.token = create_access_token(user=self.user)
+
+    def _graphql(self, query: str):
+        response = self.client.post(
+            '/graphql',
+            data=json.dumps({'query': query}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}',
+            HTTP_X_ORGANIZATION_ID=self.org.id,
+        )
+        return response.json()
+
+    def test_introspection_does_not_resolve_auth(self):
+        with self.assertNumQueries(0):
+            data = self._graphql('query { __typename }')
+        self.assertEqual(data['data'], {'__typename': 'Query'})
+
+    def test_org_scoped_query_resolves_auth_on_demand(self):
+        data = self._graphql('query { activeOrganization { id slug } }')
+        self.assertEqual(data['data']['activeOrganization'], {'id': self.org.id, 'slug': 'acme'})
+
+
+class TenantContextTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        self.other = Organization.objects.create(name='Other', slug='other', contact_email='billing@other.com')
+        OrganizationMember.objects.create(organization=self.org, user=self.user, role=OrganizationMember.Role.OWNER)
+        board = Project.objects.create(organization=self.org, name='Board')
+        Task.objects.create(project=board, title='Ship')
+        Project.objects.create(organization=self.other, name='Elsewhere')
+        self.token = create_access_token(user=self.user)
+
+    def test_verified_tenant_replaces_the_active_organization_join(self):
+        self.assertIn('organizations_organization', str(Project.objects.all().query))
+
+        with tenant_context(lambda: self.org.id):
+            self.assertNotIn('organizations_organization', str(Project.objects.all().query))
+            self.assertNotIn('organizations_organization', str(Task.objects.all().query))
+            self.assertEqual([project.name for project in Project.objects.all()], ['Board'])
+
+        with tenant_context(lambda: None):
+            self.assertIn('organizations_organization', str(Project.objects.all().query))
+
+    def test_requests_scope_queries_once_the_membership_is_resolved(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                '/graphql',
+                data=json.dumps({'query': 'query { projects { name } tasks { title } }'}),
+                content_type='application/json',
+                HTTP_AUTHORIZATION=f'Bearer {self.token}',
+                HTTP_X_ORGANIZATION_ID=self.org.id,
+            )
+
+        self.assertEqual(response.json()['data'], {'projects': [{'name': 'Board'}], 'tasks': [{'title': 'Ship'}]})
+        tables = ('projects_project', 'tasks_task')
+        scoped = [q['sql'] for q in ctx.captured_queries if any(table in q['sql'] for table in tables)]
+        self.assertTrue(scoped)
+        self.assertFalse([sql for sql in scoped if 'organizations_organization' in sql])
+
+    def test_saving_an_inactive_organization_stops_scoped_reads(self):
+        query = json.dumps({'query': 'query { tasks { title } }'})
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {self.token}', 'HTTP_X_ORGANIZATION_ID': self.org.id}
+        self.client.post('/graphql', data=query, content_type='application/json', **headers)
+
+        # What the admin change form does.
+        self.org.is_active = False
+        self.org.save()
+
+        response = self.client.post('/graphql', data=query, content_type='application/json', **headers)
+        self.assertEqual(response.json()['errors'][0]['message'], 'Invalid organization')
+        self.assertIsNotNone(Organization.all_objects.get(id=self.org.id).deactivated_at)
+
+
+class OrganizationTokenTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        self.membership = OrganizationMember.objects.create(
+            organization=self.org,
+            user=self.user,
+            role=OrganizationMember.Role.OWNER,
+        )
+
+    def _graphql(self, query: str, *, token: str, org_id: str | None = None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        if org_id:
+            headers['HTTP_X_ORGANIZATION_ID'] = org_id
+        response = self.client.post('/graphql', data=json.dumps({'query': query}), content_type='application/json', **headers)
+        return response.json()
+
+    def _switch(self) -> str:
+        data = self._graphql(
+            f'mutation {{ switchOrganization(organizationId: "{self.org.id}") {{ token }} }}',
+            token=create_access_token(user=self.user),
+        )
+        return data['data']['switchOrganization']['token']
+
+    def test_organization_token_skips_membership_lookup(self):
+        token = self._switch()
+        self._graphql('query { projects { id } }', token=token)
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+
+        with self.assertNumQueries(1):
+            data = self._graphql('query { projects { id } }', token=token)
+        self.assertEqual(data['data'], {'projects': []})
+
+    def test_organization_token_survives_losing_the_process_cache(self):
+        token = self._switch()
+        django_cache.clear()
+
+        data = self._graphql('query { projects { id } }', token=token)
+        self.assertEqual(data['data'], {'projects': []})
+
+    def test_membership_change_revokes_organization_token(self):
+        token = self._switch()
+
+        self.membership.role = OrganizationMember.Role.MEMBER
+        self.membership.save(update_fields=['role'])
+
+        data = self._graphql('query { projects { id } }', token=token)
+        self.assertEqual(data['errors'][0]['message'], 'Invalid token')
+
+    def test_organization_deactivation_revokes_organization_token(self):
+        token = self._switch()
+
+        self.org.deactivate()
+        self.org.activate()
+
+        data = self._graphql('query { projects { id } }', token=token)
+        self.assertEqual(data['errors'][0]['message'], 'Invalid token')
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+
+    def _graphql(self, query: str, *, token: str):
+        response = self.client.post(
+            '/graphql',
+            data=json.dumps({'query': query}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {token}',
+        )
+        return response.json()
+
+    def test_logout_revokes_only_the_current_token(self):
+        token = create_access_token(user=self.user)
+        other_token = create_access_token(user=self.user)
+
+        data = self._graphql('mutation { logout { ok } }', token=token)
+        self.assertEqual(data['data'], {'logout': {'ok': True}})
+
+        data = self._graphql('query { me { email } }', token=token)
+        self.assertEqual(data['errors'][0]['message'], 'Invalid token')
+
+        data = self._graphql('query { me { email } }', token=other_token)
+        self.assertEqual(data['data'], {'me': {'email': 'user@example.com'}})
+
+    def test_reloading_overlapping_rows_does_not_fill_the_filter(self):
+        token = create_access_token(user=self.user)
+        self._graphql('mutation { logout { ok } }', token=token)
+
+        revocation._filter.refreshed_at = 0.0
+        revocation.is_revoked('unknown')
+        count = revocation._filter.bloom.count
+        revocation._filter.refreshed_at = 0.0
+        revocation.is_revoked('unknown')
+
+        self.assertEqual(revocation._filter.bloom.count, count)
+
+    def test_clearrevokedtokens_deletes_expired_rows(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti='expired', user=self.user, expires_at=now - datetime.timedelta(minutes=1))
+        RevokedToken.objects.create(jti='live', user=self.user, expires_at=now + datetime.timedelta(minutes=1))
+
+        call_command('clearrevokedtokens', stdout=io.StringIO())
+
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+
+
+class LoaderRegistryTests(TestCase):
+    def setUp(self):
+        org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        for i in range(3):
+            project = Project.objects.create(organization=org, name=f'Project {i}')
+            Task.objects.create(project=project, title=f'Task {i}')
+
+    def test_forward_relations_are_batched_across_siblings(self):
+        loaders = LoaderRegistry()
+        tasks = loaders.track(Task.objects.all())
+
+        with self.assertNumQueries(2):
+            projects = [loaders.load(task, 'project') for task in tasks]
+            organizations = {loaders.load(project, 'organization').slug for project in projects}
+
+        self.assertEqual({p.name for p in projects}, {'Project 0', 'Project 1', 'Project 2'})
+        self.assertEqual(organizations, {'acme'})
+
+    def test_reverse_relations_are_batched_across_siblings(self):
+        loaders = LoaderRegistry()
+        projects = loaders.track(Project.objects.all())
+
+        with self.assertNumQueries(1):
+            tasks = [loaders.load_many(project, 'tasks') for project in projects]
+
+        self.assertEqual([len(group) for group in tasks], [1, 1, 1])
+
+
+class QueryOptimizerTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        OrganizationMember.objects.create(organization=self.org, user=self.user, role=OrganizationMember.Role.OWNER)
+        project = Project.objects.create(organization=self.org, name='Project', description='Long description')
+        Task.objects.create(project=project, title='Task', description='Long description')
+        self.token = create_access_token(user=self.user)
+
+    def _graphql(self, query: str):
+        response = self.client.post(
+            '/graphql',
+            data=json.dumps({'query': query}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}',
+            HTTP_X_ORGANIZATION_ID=self.org.id,
+        )
+        return response.json()
+
+    def _task_queries(self, query: str):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self._graphql(query)
+        sql = [q['sql'] for q in ctx.captured_queries if 'FROM "tasks_task"' in q['sql']]
+        return data, sql
+
+    def test_unselected_columns_and_relations_are_not_fetched(self):
+        data, sql = self._task_queries('query { tasks { id title } }')
+
+        self.assertEqual(data['data']['tasks'][0]['title'], 'Task')
+        self.assertEqual(len(sql), 1)
+        self.assertNotIn('"tasks_task"."description"', sql[0])
+        self.assertNotIn('"projects_project"."name"', sql[0])
+
+    def test_selected_relation_is_joined(self):
+        data, sql = self._task_queries('query { tasks { title project { name } } }')
+
+        self.assertEqual(data['data']['tasks'][0]['project'], {'name': 'Project'})
+        self.assertEqual(len(sql), 1)
+        self.assertIn('"projects_project"."name"', sql[0])
+        self.assertNotIn('"projects_project"."description"', sql[0])
+
+
+class ConnectionPaginationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        OrganizationMember.objects.create(organization=self.org, user=self.user, role=OrganizationMember.Role.OWNER)
+        project = Project.objects.create(organization=self.org, name='Project')
+        created_at = timezone.now()
+        for i in range(5):
+            task = Task.objects.create(project=project, title=f'Task {i}')
+            Task.objects.filter(pk=task.pk).update(created_at=created_at + datetime.timedelta(seconds=i))
+        self.token = create_access_token(user=self.user)
+
+    def _page(self, arguments: str):
+        response = self.client.post(
+            '/graphql',
+            data=json.dumps(
+                {'query': f'query {{ tasksConnection({arguments}) {{ edges {{ cursor node {{ title }} }} pageInfo {{ hasNextPage hasPreviousPage endCursor startCursor }} }} }}'}
+            ),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}',
+            HTTP_X_ORGANIZATION_ID=self.org.id,
+        )
+        return response.json()['data']['tasksConnection']
+
+    def test_forward_and_backward_pages_follow_cursors(self):
+        first_page = self._page('first: 2')
+        self.assertEqual([e['node']['title'] for e in first_page['edges']], ['Task 4', 'Task 3'])
+        self.assertTrue(first_page['pageInfo']['hasNextPage'])
+
+        second_page = self._page(f'first: 3, after: "{first_page["pageInfo"]["endCursor"]}"')
+        self.assertEqual([e['node']['title'] for e in second_page['edges']], ['Task 2', 'Task 1', 'Task 0'])
+        self.assertFalse(second_page['pageInfo']['hasNextPage'])
+
+        previous_page = self._page(f'last: 1, before: "{second_page["pageInfo"]["startCursor"]}"')
+        self.assertEqual([e['node']['title'] for e in previous_page['edges']], ['Task 3'])
+        self.assertTrue(previous_page['pageInfo']['hasPreviousPage'])
+
+    def test_cursor_keys_must_be_strings(self):
+        cursor = base64.urlsafe_b64encode(json.dumps([timezone.now().isoformat(), 1]).encode()).decode()
+        response = self.client.post(
+            '/graphql',
+            data=json.dumps({'query': f'query {{ tasksConnection(after: "{cursor}") {{ edges {{ cursor }} }} }}'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}',
+            HTTP_X_ORGANIZATION_ID=self.org.id,
+        )
+        self.assertEqual(response.json()['errors'][0]['message'], 'Invalid cursor')
+
+    @override_settings(GRAPHQL_MAX_PAGE_SIZE=2)
+    def test_plain_list_fields_still_return_every_row(self):
+        response = self.client.post(
+            '/graphql',
+            data=json.dumps({'query': 'query { tasks { title } }'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}',
+            HTTP_X_ORGANIZATION_ID=self.org.id,
+        )
+        titles = [task['title'] for task in response.json()['data']['tasks']]
+        self.assertEqual(titles, ['Task 4', 'Task 3', 'Task 2', 'Task 1', 'Task 0'])
+
+
+class PersistedQueryTests(TestCase):
+    query = 'query { __typename }'
+
+    def setUp(self):
+        django_cache.clear()
+        self.client = Client()
+        self.sha256 = hashlib.sha256(self.query.encode()).hexdigest()
+        self.extensions = json.dumps({'persistedQuery': {'version': 1, 'sha256Hash': self.sha256}})
+
+    def test_unknown_hash_is_registered_by_full_query(self):
+        response = self.client.get('/graphql', {'extensions': self.extensions})
+        self.assertEqual(response.json()['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_NOT_FOUND')
+
+        response = self.client.get('/graphql', {'query': self.query, 'extensions': self.extensions})
+        self.assertEqual(response.json()['data'], {'__typename': 'Query'})
+
+        response = self.client.get('/graphql', {'extensions': self.extensions})
+        self.assertEqual(response.json()['data'], {'__typename': 'Query'})
+
+    def test_mismatched_hash_is_rejected(self):
+        extensions = json.dumps({'persistedQuery': {'version': 1, 'sha256Hash': '0' * 64}})
+        response = self.client.get('/graphql', {'query': self.query, 'extensions': extensions})
+        self.assertEqual(response.json()['errors'][0]['extensions']['code'], 'INVALID_PERSISTED_QUERY')
+
+
+class QueryCostTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        OrganizationMember.objects.create(organization=self.org, user=self.user, role=OrganizationMember.Role.OWNER)
+        self.token = create_access_token(user=self.user)
+
+    def _graphql(self, query: str):
+        response = self.client.post(
+            '/graphql',
+            data=json.dumps({'query': query}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}',
+            HTTP_X_ORGANIZATION_ID=self.org.id,
+        )
+        return response.json()
+
+    def test_list_multipliers_follow_page_size(self):
+        query = 'query { tasksConnection(first: 10) { edges { node { project { name } } } } }'
+        operation = parse(query).definitions[0]
+        self.assertEqual(analyze(schema.graphql_schema, parse(query), operation, {}).cost, 1 + 10 * (1 + 1 + 1))
+
+    def test_priced_fields_use_their_configured_cost(self):
+        query = 'query { projectsConnection(first: 10) { edges { node { id taskStats { total } } } } }'
+        operation = parse(query).definitions[0]
+        costs = {'ProjectType.taskStats': 7, 'ProjectType.id': 2}
+        with override_settings(GRAPHQL_FIELD_COSTS=costs):
+            cost = analyze(schema.graphql_schema, parse(query), operation, {}).cost
+        self.assertEqual(cost, 1 + 10 * (1 + 1 + 2 + 7))
+
+    @override_settings(GRAPHQL_MAX_QUERY_COST=150)
+    def test_aliased_lists_over_budget_are_rejected_before_execution(self):
+        with self.assertNumQueries(0):
+            data = self._graphql('query { a: tasks { project { name } } b: tasks { project { name } } }')
+
+        self.assertEqual(data['errors'][0]['extensions']['code'], 'QUERY_TOO_COMPLEX')
+
+    def test_organization_budget_overrides_default(self):
+        query = 'query { a: tasks { project { name } } b: tasks { project { name } } }'
+        budgets = {self.org.id: 500}
+        with override_settings(GRAPHQL_MAX_QUERY_COST=150, GRAPHQL_ORGANIZATION_COST_BUDGETS=budgets):
+            data = self._graphql(query)
+
+        self.assertEqual(data['data'], {'a': [], 'b': []})
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        OrganizationMember.objects.create(organization=self.org, user=self.user, role=OrganizationMember.Role.OWNER)
+        self.project = Project.objects.create(organization=self.org, name='Project')
+        self.token = create_access_token(user=self.user)
+
+    def _graphql(self, query: str):
+        response = self.client.post(
+            '/graphql',
+            data=json.dumps({'query': query}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}',
+            HTTP_X_ORGANIZATION_ID=self.org.id,
+        )
+        return response.json()
+
+    def test_repeated_read_is_served_from_cache_until_a_write(self):
+        query = 'query { projects { name } }'
+        self._graphql(query)
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self._graphql(query)
+        self.assertFalse([q for q in ctx.captured_queries if 'projects_project' in q['sql']])
+        self.assertEqual(data['data']['projects'], [{'name': 'Project'}])
+
+        self._graphql(f'mutation {{ updateProject(id: "{self.project.id}", name: "Renamed") {{ project {{ id }} }} }}')
+
+        data = self._graphql(query)
+        self.assertEqual(data['data']['projects'], [{'name': 'Renamed'}])
+
+    def test_conditional_get_returns_not_modified_until_a_write(self):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {self.token}', 'HTTP_X_ORGANIZATION_ID': self.org.id}
+        params = {'query': 'query { projects { name } }'}
+
+        response = self.client.get('/graphql', params, **headers)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/graphql', params, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, 304)
+
+        self._graphql(f'mutation {{ updateProject(id: "{self.project.id}", name: "Renamed") {{ project {{ id }} }} }}')
+
+        response = self.client.get('/graphql', params, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unversioned_writes_change_the_etag_once_the_entry_expires(self):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {self.token}', 'HTTP_X_ORGANIZATION_ID': self.org.id}
+        params = {'query': 'query { projects { name } }'}
+        etag = self.client.get('/graphql', params, **headers)['ETag']
+
+        # Neither bumps the data version, so the cache key stays the same.
+        Project.objects.filter(id=self.project.id).update(name='Renamed')
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+
+        response = self.client.get('/graphql', params, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['projects'], [{'name': 'Renamed'}])
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_data_versions_live_on_the_shared_versions_cache(self):
+        version = get_data_version(organization_id=self.org.id)
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+
+        self.assertEqual(get_data_version(organization_id=self.org.id), version)
+
+
+class BatchRequestTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        OrganizationMember.objects.create(organization=self.org, user=self.user, role=OrganizationMember.Role.OWNER)
+        Project.objects.create(organization=self.org, name='Project')
+        self.token = create_access_token(user=self.user)
+
+    def _batch(self, operations: list):
+        return self.client.post(
+            '/graphql',
+            data=json.dumps(operations),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}',
+            HTTP_X_ORGANIZATION_ID=self.org.id,
+        )
+
+    def test_operations_share_one_authentication(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._batch(
+                [
+                    {'query': 'query { me { email } }'},
+                    {'query': 'query { projects { name } }'},
+                    {'query': 'query { activeOrganization { slug } }'},
+                ]
+            )
+
+        results = response.json()
+        self.assertEqual(results[0]['data'], {'me': {'email': 'user@example.com'}})
+        self.assertEqual(results[1]['data'], {'projects': [{'name': 'Project'}]})
+        self.assertEqual(results[2]['data'], {'activeOrganization': {'slug': 'acme'}})
+        self.assertEqual(len([q for q in ctx.captured_queries if 'FROM "accounts_user"' in q['sql']]), 1)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'FROM "organizations_organizationmember"' in q['sql']]), 1)
+
+    @override_settings(GRAPHQL_MAX_BATCH_SIZE=2)
+    def test_oversized_batch_is_rejected(self):
+        response = self._batch([{'query': 'query { __typename }'}] * 3)
+        self.assertEqual(response.status_code, 400)
+
+
+class MetricsTests(TestCase):
+    allowlist = [f'query {name} {{ projects {{ name }} }}' for name in ('Board', 'First', 'Second')]
+
+    def setUp(self):
+        token_cache.clear()
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        metrics_registry.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        OrganizationMember.objects.create(organization=self.org, user=self.user, role=OrganizationMember.Role.OWNER)
+        self.token = create_access_token(user=self.user)
+
+        allowlist = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+        with allowlist:
+            json.dump(self.allowlist, allowlist)
+        self.addCleanup(os.unlink, allowlist.name)
+        self.enterContext(override_settings(GRAPHQL_ALLOWLIST_PATH=allowlist.name, METRICS_TOKEN='scrape'))
+        persisted_queries._allowlist.cache_clear()
+        self.addCleanup(persisted_queries._allowlist.cache_clear)
+
+    def _graphql(self, query: str):
+        return self.client.post(
+            '/graphql',
+            data=json.dumps({'query': query}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}',
+            HTTP_X_ORGANIZATION_ID=self.org.id,
+        )
+
+    def _scrape(self) -> str:
+        return self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape').content.decode()
+
+    @override_settings(METRICS_SAMPLE_RATE=1.0, ORGANIZATION_TIERS={})
+    def test_sampled_operations_record_field_and_database_timings(self):
+        self._graphql('query Board { projects { name } }')
+
+        body = self._scrape()
+        labels = 'operation="Board",root_field="projects",tier="standard"'
+        self.assertIn(f'graphql_operation_duration_seconds_count{{{labels}}} 1', body)
+        self.assertIn(f'graphql_operation_db_queries_count{{{labels}}} 1', body)
+        self.assertIn('graphql_field_duration_seconds_count{field="Query.projects"} 1', body)
+
+    @override_settings(METRICS_MAX_LABEL_SETS=1)
+    def test_label_sets_are_capped(self):
+        self._graphql('query First { projects { name } }')
+        self._graphql('query Second { projects { name } }')
+
+        body = self._scrape()
+        self.assertNotIn('operation="Second"', body)
+        self.assertIn('operation="__other__"', body)
+
+    @override_settings(ORGANIZATION_TIERS={})
+    def test_unlisted_documents_share_the_adhoc_label(self):
+        for i in range(3):
+            self._graphql(f'query Junk{i} {{ projects {{ name }} }}')
+
+        body = self._scrape()
+        self.assertNotIn('Junk', body)
+        labels = 'operation="adhoc",root_field="projects",tier="standard"'
+        self.assertIn(f'graphql_operation_duration_seconds_count{{{labels}}} 3', body)
+
+    def test_endpoint_requires_the_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+
+    def _run_repeated_lookups(self):
+        request = SimpleNamespace()
+        with QueryCapture(request, parse('query Board { tasks { id } }').definitions[0]) as capture:
+            capture.current = 'tasks'
+            capture.budgets['tasks'] = 1
+            for _ in range(3):
+                User.objects.get(pk=self.user.pk)
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_over_budget_and_repeated_queries_raise_in_development(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'tasks ran 3 queries (budget 1)'):
+            self._run_repeated_lookups()
+
+    @override_settings(QUERY_BUDGET_MODE='log')
+    def test_over_budget_operations_are_logged_in_production(self):
+        with self.assertLogs('apps.api.query_budget', level='WARNING') as logs:
+            self._run_repeated_lookups()
+        self.assertIn('3 identical queries', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_nested_loader_queries_are_charged_to_the_root_field(self):
+        token_cache.clear()
+        org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        OrganizationMember.objects.create(organization=org, user=self.user, role=OrganizationMember.Role.OWNER)
+        Project.objects.create(organization=org, name='Board')
+
+        def graphql():
+            return self.client.post(
+                '/graphql',
+                data=json.dumps({'query': 'query Board { projects { name taskStats { total } } }'}),
+                content_type='application/json',
+                HTTP_AUTHORIZATION=f'Bearer {create_access_token(user=self.user)}',
+                HTTP_X_ORGANIZATION_ID=org.id,
+            )
+
+        self.assertEqual(graphql().json()['data'], {'projects': [{'name': 'Board', 'taskStats': {'total': 0}}]})
+
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        # The batched taskStats aggregate runs below the list, but is still charged to ``projects``.
+        with mock.patch.object(ProjectsQuery.resolve_projects, 'query_budget', 1):
+            with self.assertRaisesMessage(QueryBudgetExceeded, 'projects ran 2 queries (budget 1)'):
+                graphql()
+
+
+class TaskStatsTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        OrganizationMember.objects.create(organization=self.org, user=self.user, role=OrganizationMember.Role.MEMBER)
+        self.board = Project.objects.create(organization=self.org, name='Board')
+        self.archive = Project.objects.create(organization=self.org, name='Archive')
+        yesterday = timezone.localdate() - datetime.timedelta(days=1)
+        Task.objects.create(project=self.board, title='Late', due_date=yesterday, assignee_email='a@example.com')
+        Task.objects.create(project=self.board, title='Late but done', due_date=yesterday, status=Task.Status.DONE)
+        Task.objects.create(project=self.archive, title='Open', assignee_email='a@example.com')
+        self.token = create_access_token(user=self.user)
+
+    def _graphql(self, query: str):
+        response = self.client.post(
+            '/graphql',
+            data=json.dumps({'query': query}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}',
+            HTTP_X_ORGANIZATION_ID=self.org.id,
+        )
+        return response.json()
+
+    def test_project_stats_are_aggregated_in_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self._graphql('query { projects { name taskStats { total overdue byStatus { status count } } } }')
+
+        self.assertEqual(len([q for q in ctx.captured_queries if 'tasks_task' in q['sql']]), 1)
+        stats = {project['name']: project['taskStats'] for project in data['data']['projects']}
+        self.assertEqual((stats['Board']['total'], stats['Board']['overdue']), (2, 1))
+        self.assertEqual(
+            stats['Board']['byStatus'],
+            [{'status': 'todo', 'count': 1}, {'status': 'in_progress', 'count': 0}, {'status': 'done', 'count': 1}],
+        )
+        self.assertEqual((stats['Archive']['total'], stats['Archive']['overdue']), (1, 0))
+
+    def test_organization_stats_count_tasks_per_assignee(self):
+        data = self._graphql('query { organizationTaskStats { total byAssignee { assigneeEmail count } } }')
+
+        stats = data['data']['organizationTaskStats']
+        self.assertEqual(stats['total'], 3)
+        self.assertEqual(
+            stats['byAssignee'],
+            [{'assigneeEmail': 'a@example.com', 'count': 2}, {'assigneeEmail': None, 'count': 1}],
+        )
+
+
+class SubscriptionTests(TransactionTestCase):
+    # Events are published on commit, so the writes below must really commit.
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        self.membership = OrganizationMember.objects.create(
+            organization=self.org,
+            user=self.user,
+            role=OrganizationMember.Role.MEMBER,
+        )
+        self.project = Project.objects.create(organization=self.org, name='Board')
+        self.other_project = Project.objects.create(organization=self.org, name='Archive')
+        self.token = create_access_token(user=self.user)
+
+    async def _connect(self, payload):
+        from config.asgi import application
+
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        scope = {'type': 'websocket', 'path': '/graphql', 'headers': [], 'subprotocols': ['graphql-transport-ws']}
+        app = asyncio.ensure_future(application(scope, inbox.get, outbox.put))
+        await inbox.put({'type': 'websocket.connect'})
+        self.assertEqual((await outbox.get())['subprotocol'], 'graphql-transport-ws')
+        await self._send(inbox, {'type': 'connection_init', 'payload': payload})
+        return app, inbox, outbox
+
+    async def _send(self, inbox, message):
+        await inbox.put({'type': 'websocket.receive', 'text': json.dumps(message)})
+
+    async def _next(self, outbox):
+        message = await asyncio.wait_for(outbox.get(), timeout=5)
+        return json.loads(message['text']) if 'text' in message else message
+
+    async def test_task_changes_are_pushed_to_project_subscribers(self):
+        app, inbox, outbox = await self._connect(
+            {'Authorization': f'Bearer {self.token}', 'X-Organization-ID': self.org.id}
+        )
+        self.assertEqual((await self._next(outbox))['type'], 'connection_ack')
+
+        query = (
+            'subscription ($id: ID!) { taskChanged(projectId: $id) '
+            '{ action task { title project { name taskStats { total } } } } }'
+        )
+        await self._send(
+            inbox,
+            {'id': '1', 'type': 'subscribe', 'payload': {'query': query, 'variables': {'id': self.project.id}}},
+        )
+        channel = task_events.task_channel(organization_id=self.org.id)
+        while not get_broker().subscriber_count(channel):
+            await asyncio.sleep(0.01)
+
+        create_task = database_sync_to_async(task_services.create_task)
+        await create_task(organization=self.org, project_id=self.other_project.id, title='Elsewhere')
+        await create_task(organization=self.org, project_id=self.project.id, title='Ship it')
+
+        message = await self._next(outbox)
+        self.assertEqual(message['id'], '1')
+        self.assertEqual(
+            message['payload'],
+            {
+                'data': {
+                    'taskChanged': {
+                        'action': 'created',
+                        'task': {'title': 'Ship it', 'project': {'name': 'Board', 'taskStats': {'total': 1}}},
+                    }
+                }
+            },
+        )
+
+        await self._send(inbox, {'id': '1', 'type': 'complete'})
+        while get_broker().subscriber_count(channel):
+            await asyncio.sleep(0.01)
+        await inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(app, timeout=5)
+
+    @override_settings(SUBSCRIPTIONS_AUTH_RECHECK_SECONDS=0)
+    async def test_removed_members_stop_receiving_events(self):
+        app, inbox, outbox = await self._connect(
+            {'Authorization': f'Bearer {self.token}', 'X-Organization-ID': self.org.id}
+        )
+        self.assertEqual((await self._next(outbox))['type'], 'connection_ack')
+        query = 'subscription ($id: ID!) { taskChanged(projectId: $id) { action } }'
+        await self._send(
+            inbox,
+            {'id': '1', 'type': 'subscribe', 'payload': {'query': query, 'variables': {'id': self.project.id}}},
+        )
+        channel = task_events.task_channel(organization_id=self.org.id)
+        while not get_broker().subscriber_count(channel):
+            await asyncio.sleep(0.01)
+
+        await database_sync_to_async(self.membership.delete)()
+        await database_sync_to_async(task_services.create_task)(
+            organization=self.org,
+            project_id=self.project.id,
+            title='Secret',
+        )
+        self.assertEqual((await self._next(outbox))['code'], 4403)
+
+        await inbox.put({'type': 'websocket.disconnect', 'code': 4403})
+        await asyncio.wait_for(app, timeout=5)
+
+    @override_settings(SUBSCRIPTIONS_AUTH_RECHECK_SECONDS=0)
+    async def test_payload_resolvers_see_the_rechecked_membership(self):
+        roles = []
+
+        def record_role(info, permission):
+            roles.append(info.context.membership.role)
+            return require_org_permission(info, permission)
+
+        app, inbox, outbox = await self._connect(
+            {'Authorization': f'Bearer {self.token}', 'X-Organization-ID': self.org.id}
+        )
+        self.assertEqual((await self._next(outbox))['type'], 'connection_ack')
+        query = 'subscription ($id: ID!) { taskChanged(projectId: $id) { task { project { taskStats { total } } } } }'
+        await self._send(
+            inbox,
+            {'id': '1', 'type': 'subscribe', 'payload': {'query': query, 'variables': {'id': self.project.id}}},
+        )
+        channel = task_events.task_channel(organization_id=self.org.id)
+        while not get_broker().subscriber_count(channel):
+            await asyncio.sleep(0.01)
+
+        create_task = database_sync_to_async(task_services.create_task)
+        with mock.patch('apps.api.types.require_org_permission', side_effect=record_role):
+            await create_task(organization=self.org, project_id=self.project.id, title='First')
+            self.assertEqual((await self._next(outbox))['type'], 'next')
+
+            self.membership.role = OrganizationMember.Role.MANAGER
+            await database_sync_to_async(self.membership.save)(update_fields=['role'])
+            await create_task(organization=self.org, project_id=self.project.id, title='Second')
+            self.assertEqual((await self._next(outbox))['type'], 'next')
+
+        self.assertEqual(roles, [OrganizationMember.Role.MEMBER, OrganizationMember.Role.MANAGER])
+        await inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(app, timeout=5)
+
+    async def test_connection_closes_when_the_token_expires(self):
+        with override_settings(JWT_ACCESS_TOKEN_TTL_SECONDS=1):
+            token = create_access_token(user=self.user)
+        app, inbox, outbox = await self._connect({'Authorization': f'Bearer {token}', 'X-Organization-ID': self.org.id})
+        self.assertEqual((await self._next(outbox))['type'], 'connection_ack')
+
+        self.assertEqual((await self._next(outbox))['code'], 4403)
+        await inbox.put({'type': 'websocket.disconnect', 'code': 4403})
+        await asyncio.wait_for(app, timeout=5)
+
+    async def test_connection_requires_a_valid_token(self):
+        app, inbox, outbox = await self._connect({'Authorization': 'Bearer invalid'})
+
+        self.assertEqual((await self._next(outbox))['code'], 4403)
+        await inbox.put({'type': 'websocket.disconnect', 'code': 4403})
+        await asyncio.wait_for(app, timeout=5)
@@ -0,0 +1,57 @@
+import hmac
+
+from django.conf import settings
+
+from apps.accounts.models import User
+from apps.core.cache import LRUCache, ModelSnapshot
+
+from .jwt import decode_access_token
+
+
+USER_SNAPSHOT_FIELDS = ('id', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser')
+
+
+class _VerifiedToken:
+    __slots__ = ('token', 'payload', 'user')
+
+    def __init__(self, *, token: str, payload: dict, user: ModelSnapshot):
+        self.token = token
+        self.payload = payload
+        self.user = user
+
+
+_verified_tokens = LRUCache(
+    max_entries=settings.JWT_TOKEN_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.JWT_TOKEN_CACHE_TTL_SECONDS,
+)
+
+
+def authenticate_token(*, token: str):
+    signature = token.rsplit('.', 1)[-1]
+
+    cached = _verified_tokens.get(signature)
+    if cached is not None and hmac.compare_digest(cached.token, token):
+        return dict(cached.payload), cached.user.restore()
+
+    payload = decode_access_token(token=token)
+    user = User.objects.get(pk=payload.get('sub'), is_active=True)
+
+    _verified_tokens.set(
+        signature,
+        _VerifiedToken(token=token, payload=payload, user=ModelSnapshot.capture(user, USER_SNAPSHOT_FIELDS)),
+        expires_at=payload.get('exp'),
+    )
+    return dict(payload), user
+
+
+def invalidate_user(user_id) -> int:
+    user_id = str(user_id)
+    return _verified_tokens.delete_matching(lambda entry: entry.payload.get('sub') == user_id)
+
+
+def invalidate_token(*, jti: str) -> int:
+    return _verified_tokens.delete_matching(lambda entry: entry.payload.get('jti') == jti)
+
+
+def clear() -> None:
+    _verified_tokens.clear()
@@ -1,10 +1,15 @@
+import graphene
 from graphene_django import DjangoObjectType
 
 from apps.accounts.models import User
 from apps.organizations.models import Organization, OrganizationMember
 from apps.projects.models import Project
+from apps.tasks import selectors as task_selectors
 from apps.tasks.models import Task, TaskComment
 
+from .common import require_org_permission
+from .loaders import get_loaders
+
 
 class UserType(DjangoObjectType):
     class Meta:
@@ -23,20 +28,117 @@ class OrganizationMemberType(DjangoObjectType):
         model = OrganizationMember
         fields = ('id', 'role', 'permissions', 'is_active', 'organization', 'user')
 
+    def resolve_organization(self, info):
+        return get_loaders(info).load(self, 'organization')
+
+    def resolve_user(self, info):
+        return get_loaders(info).load(self, 'user')
+
+
+class TaskStatusCountType(graphene.ObjectType):
+    status = graphene.String(required=True)
+    count = graphene.Int(required=True)
+
+
+class TaskAssigneeCountType(graphene.ObjectType):
+    assignee_email = graphene.String()
+    count = graphene.Int(required=True)
+
+
+class TaskStatsType(graphene.ObjectType):
+    total = graphene.Int(required=True)
+    overdue = graphene.Int(required=True)
+    by_status = graphene.List(graphene.NonNull(TaskStatusCountType), required=True)
+    by_assignee = graphene.List(graphene.NonNull(TaskAssigneeCountType), required=True)
+
+    def resolve_by_status(self, info):
+        return [TaskStatusCountType(status=status, count=count) for status, count in self.by_status.items()]
+
+    def resolve_by_assignee(self, info):
+        return [
+            TaskAssigneeCountType(assignee_email=email or None, count=count)
+            for email, count in sorted(self.by_assignee.items(), key=lambda item: (-item[1], item[0]))
+        ]
+
 
 class ProjectType(DjangoObjectType):
+    task_stats = graphene.Field(TaskStatsType, required=True)
+
     class Meta:
         model = Project
-        fields = ('id', 'name', 'description', 'created_at', 'updated_at')
+        fields = (
+            'id',
+            'name',
+            'description',
+            'todo_count',
+            'in_progress_count',
+            'done_count',
+            'created_at',
+            'updated_at',
+        )
+
+    def resolve_task_stats(self, info):
+        org, _membership = require_org_permission(info, OrganizationMember.Permission.TASKS_READ)
+        return get_loaders(info).load_computed(
+            self,
+            'task_stats',
+            lambda project_ids: task_selectors.get_task_stats_by_project(organization=org, project_ids=project_ids),
+        )
 
 
 class TaskType(DjangoObjectType):
     class Meta:
         model = Task
-        fields = ('id', 'project', 'title', 'description', 'status', 'due_date', 'assignee_email', 'created_at', 'updated_at')
+        fields = (
+            'id',
+            'project',
+            'title',
+            'description',
+            'status',
+            'due_date',
+            'assignee_email',
+            'comment_count',
+            'created_at',
+            'updated_at',
+        )
+
+    def resolve_project(self, info):
+        return get_loaders(info).load(self, 'project')
 
 
 class TaskCommentType(DjangoObjectType):
     class Meta:
         model = TaskComment
         fields = ('id', 'task', 'author', 'content', 'created_at', 'updated_at')
+
+    def resolve_task(self, info):
+        return get_loaders(info).load(self, 'task')
+
+    def resolve_author(self, info):
+        return get_loaders(info).load(self, 'author')
+
+
+class TaskChangedEventType(graphene.ObjectType):
+    action = graphene.String(required=True)
+    task = graphene.Field(TaskType, required=True)
+
+
+class BulkItemErrorType(graphene.ObjectType):
+    index = graphene.Int(required=True)
+    id = graphene.ID()
+    message = graphene.String(required=True)
+
+
+class ProjectConnection(graphene.relay.Connection):
+    class Meta:
+        node = ProjectType
+
+
+class TaskConnection(graphene.relay.Connection):
+    class Meta:
+        node = TaskType
+
+
+class TaskCommentConnection(graphene.relay.Connection):
+    class Meta:
+        node = TaskCommentType
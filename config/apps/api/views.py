@@ -0,0 +1,166 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast
+
+from . import response_cache
+from .cost import QueryCostError, check_query_cost
+from .documents import get_validated_document
+from .metrics import OperationMetrics
+from .persisted_queries import PersistedQueryError, resolve_query
+from .query_budget import QueryCapture
+
+
+class NotModified(Exception):
+    def __init__(self, etag: str):
+        super().__init__(etag)
+        self.etag = etag
+
+
+class PMSGraphQLView(GraphQLView):
+    def dispatch(self, request, *args, **kwargs):
+        request.graphql_etag = None
+        # A JSON array is a batch: one auth/tenant resolution and one loader registry for every operation.
+        if request.method == 'POST' and self.get_content_type(request) == 'application/json':
+            self.batch = request.body.lstrip().startswith(b'[')
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except NotModified as exc:
+            response = HttpResponseNotModified()
+            response['ETag'] = exc.etag
+
+        if request.graphql_etag and response.status_code == 200:
+            response['ETag'] = request.graphql_etag
+        if response.has_header('ETag'):
+            response['Cache-Control'] = 'private, no-cache'
+            patch_vary_headers(response, ('Authorization', 'X-Organization-ID'))
+        return response
+
+    def parse_body(self, request):
+        data = super().parse_body(request)
+        if self.batch:
+            if len(data) > settings.GRAPHQL_MAX_BATCH_SIZE:
+                raise HttpError(
+                    HttpResponseBadRequest(f'Batches are limited to {settings.GRAPHQL_MAX_BATCH_SIZE} operations.')
+                )
+            if not all(isinstance(entry, dict) for entry in data):
+                raise HttpError(HttpResponseBadRequest('Every batched operation must be a JSON object.'))
+        return data
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        extensions = request.GET.get('extensions') or data.get('extensions')
+        try:
+            query = resolve_query(query=query, extensions=extensions)
+        except PersistedQueryError as exc:
+            return ExecutionResult(errors=[exc])
+
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest('Must provide query string.'))
+
+        schema = self.schema.graphql_schema
+        document, errors = get_validated_document(schema, query, self.validation_rules)
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if (
+            request.method.lower() == 'get'
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ['POST'],
+                    f'Can only perform a {operation_ast.operation.value} operation from a POST request.',
+                )
+            )
+
+        if operation_ast is not None and operation_ast.operation == OperationType.SUBSCRIPTION:
+            return ExecutionResult(errors=[GraphQLError('Subscriptions are only served over WebSocket.')])
+
+        if operation_ast is None:
+            return self.execute_document(request, document, operation_ast, variables, operation_name)
+
+        metrics = OperationMetrics(request, operation_ast, operation_name, query=query)
+        with metrics, QueryCapture(request, operation_ast):
+            result = self.execute_operation(request, document, operation_ast, query, variables, operation_name)
+            metrics.failed = bool(result.errors)
+        return result
+
+    def execute_operation(self, request, document, operation_ast, query, variables, operation_name):
+        schema = self.schema.graphql_schema
+        try:
+            check_query_cost(schema, document, operation_ast, variables, organization=request.active_organization)
+        except QueryCostError as exc:
+            return ExecutionResult(errors=[exc])
+
+        cache_key = response_cache.get_cache_key(
+            request,
+            operation_ast,
+            query=query,
+            variables=variables,
+            operation_name=operation_name,
+        )
+        if cache_key is None:
+            result = self.execute_document(request, document, operation_ast, variables, operation_name)
+            if operation_ast.operation == OperationType.MUTATION:
+                # Later operations in the same batch must not be served rows loaded before the write.
+                request.loaders = None
+            return result
+
+        conditional = request.method == 'GET' and not self.batch
+        data = response_cache.load(cache_key)
+        if data is not None:
+            if conditional:
+                etag = response_cache.get_etag(data)
+                if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+                if etag in if_none_match or '*' in if_none_match:
+                    raise NotModified(etag)
+                request.graphql_etag = etag
+            return ExecutionResult(data=data)
+
+        result = self.execute_document(request, document, operation_ast, variables, operation_name)
+        if not result.errors:
+            response_cache.store(cache_key, result.data)
+            if conditional:
+                request.graphql_etag = response_cache.get_etag(result.data)
+        return result
+
+    def execute_document(self, request, document, operation_ast, variables, operation_name):
+        try:
+            execute_options = {
+                'root_value': self.get_root_value(request),
+                'context_value': self.get_context(request),
+                'variable_values': variables,
+                'operation_name': operation_name,
+                'middleware': self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options['execution_context_class'] = self.execution_context_class
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get('ATOMIC_MUTATIONS', False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(self.schema.graphql_schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(self.schema.graphql_schema, document, **execute_options)
+        except Exception as exc:
+            return ExecutionResult(errors=[exc])
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import logging
+import time
+
+from django.conf import settings
+from graphql import ExecutionResult, GraphQLError, OperationType, create_source_event_stream, execute, get_operation_ast
+
+from .cost import QueryCostError, check_query_cost
+from .documents import get_validated_document
+from .middleware import RequestAuth, parse_bearer_token
+from .subscriptions import database_sync_to_async
+
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL = 'graphql-transport-ws'
+
+
+class SubscriptionContext:
+    """The ``info.context`` of a WebSocket operation: the request attributes resolvers read, resolved up front."""
+
+    def __init__(self, auth: RequestAuth):
+        self.refresh(auth)
+        self.loaders = None
+        self.query_capture = None
+
+    def refresh(self, auth: RequestAuth) -> None:
+        self.request_auth = auth
+        self.jwt_payload = auth.jwt_payload
+        self.auth_error = auth.auth_error
+        self.user = auth.user
+        self.org_error = auth.org_error
+        self.membership = auth.membership
+        self.active_organization = auth.active_organization
+
+
+class GraphQLWebSocketApp:
+    """ASGI app speaking the graphql-transport-ws protocol for subscription operations."""
+
+    def __init__(self, schema):
+        self.schema = schema.graphql_schema
+
+    async def __call__(self, scope, receive, send):
+        event = await receive()
+        if event['type'] != 'websocket.connect':
+            return
+        if PROTOCOL not in scope.get('subprotocols', ()):
+            await send({'type': 'websocket.close', 'code': 4406})
+            return
+
+        await send({'type': 'websocket.accept', 'subprotocol': PROTOCOL})
+        await _Connection(self.schema, scope, send).run(receive)
+
+
+class _Connection:
+    def __init__(self, schema, scope, send):
+        self.schema = schema
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        self._send = send
+        self.context_auth: RequestAuth | None = None
+        self.authorized_until = 0.0
+        self.expiry: asyncio.Future | None = None
+        self.init_received = False
+        self.closed = False
+        self.operations: dict[str, asyncio.Task] = {}
+
+    async def run(self, receive) -> None:
+        init_timeout = asyncio.ensure_future(self._close_without_init())
+        try:
+            while not self.closed:
+                event = await receive()
+                if event['type'] == 'websocket.disconnect':
+                    self.closed = True
+                elif event['type'] == 'websocket.receive':
+                    await self.handle(event.get('text') or (event.get('bytes') or b'').decode())
+        finally:
+            init_timeout.cancel()
+            if self.expiry is not None:
+                self.expiry.cancel()
+            for task in self.operations.values():
+                task.cancel()
+
+    async def handle(self, raw: str) -> None:
+        try:
+            message = json.loads(raw)
+            message_type = message['type']
+        except (ValueError, TypeError, KeyError):
+            await self.close(4400, 'Invalid message received')
+            return
+
+        if message_type == 'connection_init':
+            await self.connection_init(message.get('payload') or {})
+        elif message_type == 'ping':
+            await self.send({'type': 'pong'})
+        elif message_type == 'pong':
+            pass
+        elif message_type == 'subscribe':
+            await self.start(message)
+        elif message_type == 'complete':
+            task = self.operations.pop(message.get('id'), None)
+            if task is not None:
+                task.cancel()
+        else:
+            await self.close(4400, f'Unknown message type {message_type}')
+
+    async def connection_init(self, payload) -> None:
+        if self.init_received:
+            await self.close(4429, 'Too many initialisation requests')
+            return
+        self.init_received = True
+
+        # Browsers cannot set headers on a WebSocket upgrade, so the init payload may carry them instead.
+        payload = {str(key).lower(): value for key, value in payload.items()} if isinstance(payload, dict) else {}
+        token = parse_bearer_token(str(payload.get('authorization') or self.headers.get('authorization', '')))
+        organization_id = payload.get('x-organization-id') or self.headers.get('x-organization-id')
+        if not token:
+            await self.close(4403, 'Forbidden')
+            return
+
+        auth = RequestAuth(token=token, organization_id=str(organization_id).strip() if organization_id else None)
+        if not await database_sync_to_async(_is_authorized)(auth):
+            await self.close(4403, 'Forbidden')
+            return
+
+        self.context_auth = auth
+        self.authorized_until = time.monotonic() + settings.SUBSCRIPTIONS_AUTH_RECHECK_SECONDS
+        self.expiry = asyncio.ensure_future(self._close_at(auth.jwt_payload['exp']))
+        await self.send({'type': 'connection_ack'})
+
+    async def authorize(self) -> bool:
+        # Revocation and membership changes are picked up within SUBSCRIPTIONS_AUTH_RECHECK_SECONDS.
+        if time.monotonic() < self.authorized_until:
+            return True
+
+        auth = RequestAuth(token=self.context_auth.token, organization_id=self.context_auth.organization_id)
+        if not await database_sync_to_async(_is_authorized)(auth):
+            await self.close(4403, 'Forbidden')
+            return False
+        self.context_auth = auth
+        self.authorized_until = time.monotonic() + settings.SUBSCRIPTIONS_AUTH_RECHECK_SECONDS
+        return True
+
+    async def start(self, message) -> None:
+        if self.context_auth is None:
+            await self.close(4401, 'Unauthorized')
+            return
+
+        operation_id = message.get('id')
+        payload = message.get('payload')
+        if not isinstance(operation_id, str) or not isinstance(payload, dict):
+            await self.close(4400, 'Invalid message received')
+            return
+        if operation_id in self.operations:
+            await self.close(4409, f'Subscriber for {operation_id} already exists')
+            return
+
+        self.operations[operation_id] = asyncio.ensure_future(self.execute(operation_id, payload))
+
+    async def execute(self, operation_id: str, payload: dict) -> None:
+        try:
+            errors = await self.stream(operation_id, payload)
+            if errors:
+                await self.send({'id': operation_id, 'type': 'error', 'payload': [error.formatted for error in errors]})
+            else:
+                await self.send({'id': operation_id, 'type': 'complete'})
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception('Subscription %s failed', operation_id)
+            await self.send({'id': operation_id, 'type': 'error', 'payload': [{'message': 'Internal server error'}]})
+        finally:
+            if self.operations.get(operation_id) is asyncio.current_task():
+                del self.operations[operation_id]
+
+    async def stream(self, operation_id: str, payload: dict) -> list[GraphQLError]:
+        query = payload.get('query')
+        if not isinstance(query, str) or not query:
+            return [GraphQLError('Must provide query string.')]
+        variables = payload.get('variables') or {}
+        operation_name = payload.get('operationName')
+
+        document, errors = get_validated_document(self.schema, query)
+        if errors:
+            return [error if isinstance(error, GraphQLError) else GraphQLError(str(error)) for error in errors]
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if operation_ast is None or operation_ast.operation != OperationType.SUBSCRIPTION:
+            return [GraphQLError('Only subscription operations are served over WebSocket.')]
+
+        context = SubscriptionContext(self.context_auth)
+        try:
+            check_query_cost(self.schema, document, operation_ast, variables, organization=context.active_organization)
+        except QueryCostError as exc:
+            return [exc]
+
+        events = await create_source_event_stream(
+            self.schema,
+            document,
+            context_value=context,
+            variable_values=variables,
+            operation_name=operation_name,
+        )
+        if isinstance(events, ExecutionResult):
+            return events.errors
+
+        # Payload fields may query the database lazily (e.g. taskStats), which Django only allows off the event loop.
+        execute_event = database_sync_to_async(execute)
+        try:
+            async for event in events:
+                if not await self.authorize():
+                    break
+                if context.request_auth is not self.context_auth:
+                    # Resolvers check the membership and permissions of the latest recheck, not the subscribe-time ones.
+                    context.refresh(self.context_auth)
+                result = await execute_event(
+                    self.schema,
+                    document,
+                    root_value=event,
+                    context_value=context,
+                    variable_values=variables,
+                    operation_name=operation_name,
+                )
+                await self.send({'id': operation_id, 'type': 'next', 'payload': result.formatted})
+        finally:
+            await events.aclose()
+        return []
+
+    async def send(self, message: dict) -> None:
+        if not self.closed:
+            await self._send({'type': 'websocket.send', 'text': json.dumps(message)})
+
+    async def close(self, code: int, reason: str) -> None:
+        if not self.closed:
+            self.closed = True
+            await self._send({'type': 'websocket.close', 'code': code, 'reason': reason})
+
+    async def _close_at(self, expires_at: float) -> None:
+        await asyncio.sleep(max(0.0, expires_at - time.time()))
+        await self.close(4403, 'Forbidden')
+
+    async def _close_without_init(self) -> None:
+        await asyncio.sleep(settings.SUBSCRIPTIONS_CONNECTION_INIT_TIMEOUT_SECONDS)
+        if not self.init_received:
+            await self.close(4408, 'Connection initialisation timeout')
+
+
+def _is_authorized(auth: RequestAuth) -> bool:
+    # Resolves the token (expiry, revocation) and the organization membership, as an HTTP request would.
+    return not (auth.auth_error or auth.jwt_payload is None or auth.org_error)
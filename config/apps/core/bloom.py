@@ -0,0 +1,32 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, *, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray(math.ceil(self.size / 8))
+
+    def add(self, key: str) -> None:
+        added = False
+        for position in self._positions(key):
+            bit = 1 << (position & 7)
+            if not self._bits[position >> 3] & bit:
+                self._bits[position >> 3] |= bit
+                added = True
+        # Re-adding a key (or one that already tests positive) leaves the fill level unchanged.
+        if added:
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
@@ -0,0 +1,94 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    def __init__(self, *, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, *, expires_at: float | None = None) -> None:
+        deadline = time.time() + self.ttl_seconds
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+
+        with self._lock:
+            self._entries[key] = (deadline, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def delete_matching(self, predicate) -> int:
+        with self._lock:
+            keys = [key for key, (_expires_at, value) in self._entries.items() if predicate(value)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ModelSnapshot:
+    # Fields that were not captured are deferred on the restored instance.
+    __slots__ = ('model', 'db', 'field_names', 'values')
+
+    def __init__(self, *, model, db: str, field_names: tuple[str, ...], values: tuple):
+        self.model = model
+        self.db = db
+        self.field_names = field_names
+        self.values = values
+
+    @classmethod
+    def capture(cls, instance, field_names=None) -> 'ModelSnapshot':
+        concrete_fields = instance._meta.concrete_fields
+        if field_names is None:
+            attnames = tuple(f.attname for f in concrete_fields)
+        else:
+            # Model.from_db expects values in concrete field order.
+            wanted = {instance._meta.get_field(name).attname for name in field_names}
+            attnames = tuple(f.attname for f in concrete_fields if f.attname in wanted)
+        return cls(
+            model=type(instance),
+            db=instance._state.db or 'default',
+            field_names=attnames,
+            values=tuple(getattr(instance, attname) for attname in attnames),
+        )
+
+    def restore(self):
+        return self.model.from_db(self.db, self.field_names, copy.deepcopy(self.values))
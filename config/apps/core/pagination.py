@@ -0,0 +1,73 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    def __init__(self, *, items: list, has_next_page: bool, has_previous_page: bool):
+        self.items = items
+        self.has_next_page = has_next_page
+        self.has_previous_page = has_previous_page
+
+
+def encode_cursor(instance) -> str:
+    raw = json.dumps([instance.created_at.isoformat(), str(instance.pk)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, str]:
+    try:
+        created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(pk, str):
+            raise TypeError('Cursor key must be a string')
+        return datetime.datetime.fromisoformat(created_at), pk
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise ValidationError('Invalid cursor') from exc
+
+
+def paginate_keyset(
+    queryset,
+    *,
+    descending: bool,
+    max_page_size: int,
+    first: int | None = None,
+    after: str | None = None,
+    last: int | None = None,
+    before: str | None = None,
+) -> KeysetPage:
+    # Pages are sliced on (created_at, id) so every page is an index range scan, never an OFFSET.
+    if first is not None and last is not None:
+        raise ValidationError('Pass either first or last, not both')
+
+    size = first if last is None else last
+    if size is None:
+        size = max_page_size
+    if size < 0 or size > max_page_size:
+        raise ValidationError(f'Page size must be between 0 and {max_page_size}')
+
+    if after is not None:
+        queryset = queryset.filter(_beyond(decode_cursor(after), forward=True, descending=descending))
+    if before is not None:
+        queryset = queryset.filter(_beyond(decode_cursor(before), forward=False, descending=descending))
+
+    backwards = last is not None
+    ordering = ('created_at', 'id') if descending == backwards else ('-created_at', '-id')
+    rows = list(queryset.order_by(*ordering)[: size + 1])
+    has_more = len(rows) > size
+    rows = rows[:size]
+
+    if backwards:
+        rows.reverse()
+        return KeysetPage(items=rows, has_next_page=before is not None, has_previous_page=has_more)
+    return KeysetPage(items=rows, has_next_page=has_more, has_previous_page=after is not None)
+
+
+def _beyond(cursor, *, forward: bool, descending: bool) -> Q:
+    created_at, pk = cursor
+    if forward == descending:
+        return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+    return Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
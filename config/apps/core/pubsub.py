@@ -0,0 +1,184 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+POSTGRES_CHANNEL = 'pms_events'
+RECONNECT_DELAY_SECONDS = 1
+
+
+class Message:
+    __slots__ = ('channel', 'data', 'memo')
+
+    def __init__(self, channel: str, data: dict):
+        self.channel = channel
+        self.data = data
+        # One Message is delivered to every subscriber of a channel; consumers share derived values here.
+        self.memo: dict = {}
+
+
+class Subscription:
+    def __init__(self, broker: 'Broker', channel: str, *, maxsize: int):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def put(self, message: Message) -> None:
+        # Slow consumers lose their oldest events instead of buffering without bound.
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(message)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Message:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Fans published events out to the asyncio subscribers of this process.
+
+    ``publish`` is synchronous and may be called from any thread; the backend
+    decides whether delivery stays in-process or goes through Postgres so that
+    every worker's broker sees it.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[Subscription]] = defaultdict(set)
+
+    def publish(self, channel: str, events: list[dict]) -> None:
+        if events:
+            self.backend.publish(self, channel, events)
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel, maxsize=settings.SUBSCRIPTIONS_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        self.backend.start(self)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    def dispatch(self, channel: str, events: list[dict]) -> None:
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(channel, ()))
+        if not subscribers:
+            return
+
+        messages = [Message(channel, data) for data in events]
+        by_loop = defaultdict(list)
+        for subscription in subscribers:
+            by_loop[subscription.loop].append(subscription)
+        # One wake-up per event loop, however many connections are subscribed.
+        for loop, group in by_loop.items():
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_deliver, group, messages)
+
+
+def _deliver(subscriptions: list[Subscription], messages: list[Message]) -> None:
+    for subscription in subscriptions:
+        for message in messages:
+            subscription.put(message)
+
+
+class LocalBackend:
+    def publish(self, broker: Broker, channel: str, events: list[dict]) -> None:
+        broker.dispatch(channel, events)
+
+    def start(self, broker: Broker) -> None:
+        pass
+
+
+class PostgresBackend:
+    def __init__(self, *, using: str = 'default'):
+        self.using = using
+        self._listener: asyncio.Task | None = None
+
+    def publish(self, broker: Broker, channel: str, events: list[dict]) -> None:
+        payloads = [json.dumps({'channel': channel, 'data': data}, cls=DjangoJSONEncoder) for data in events]
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload',
+                [POSTGRES_CHANNEL, payloads],
+            )
+
+    def start(self, broker: Broker) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen(broker))
+
+    async def _listen(self, broker: Broker) -> None:
+        import psycopg
+
+        # A single LISTEN connection per process; per-organization routing happens in the broker.
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(**self._connection_params(), autocommit=True) as conn:
+                    await conn.execute(f'LISTEN {POSTGRES_CHANNEL}')
+                    async for notify in conn.notifies():
+                        event = json.loads(notify.payload)
+                        broker.dispatch(event['channel'], [event['data']])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Lost the %s listener connection; reconnecting', POSTGRES_CHANNEL)
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    def _connection_params(self) -> dict:
+        settings_dict = connections[self.using].settings_dict
+        params = {
+            'dbname': settings_dict['NAME'],
+            'user': settings_dict['USER'],
+            'password': settings_dict['PASSWORD'],
+            'host': settings_dict['HOST'],
+            'port': settings_dict['PORT'],
+        }
+        return {key: value for key, value in params.items() if value}
+
+
+BACKENDS = {
+    'local': LocalBackend,
+    'postgres': PostgresBackend,
+}
+
+_broker: Broker | None = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> Broker:
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = Broker(BACKENDS[settings.SUBSCRIPTIONS_BACKEND]())
+        return _broker
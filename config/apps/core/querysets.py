@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import NotSupportedError, connections, models, transaction
+from django.db.models.sql import UpdateQuery
 from django.utils import timezone
 
 
@@ -16,3 +17,49 @@ class SoftDeleteQuerySet(models.QuerySet):
 
     def dead(self):
         return self.filter(deleted_at__isnull=False)
+
+    def update_returning(self, **kwargs) -> list:
+        # Like update(), but returns the updated rows as instances from the same statement.
+        compiled = self.compile_update(**kwargs)
+        if compiled is None:
+            return []
+        sql, params, compiler = compiled
+
+        connection = connections[self.db]
+        returning = ', '.join(connection.ops.quote_name(field.column) for field in self.model._meta.concrete_fields)
+        with transaction.mark_for_rollback_on_error(using=self.db):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{sql} RETURNING {returning}', params)
+                rows = cursor.fetchall()
+        return self.from_returned_rows(rows, compiler)
+
+    def compile_update(self, **kwargs):
+        """Compile ``update(**kwargs)`` to ``(sql, params, compiler)`` without running it; ``None`` if a no-op."""
+        if self.query.is_sliced:
+            raise TypeError('Cannot update a query once a slice has been taken.')
+        connection = connections[self.db]
+        if connection.vendor not in {'postgresql', 'sqlite'}:
+            raise NotSupportedError(f'UPDATE ... RETURNING is not supported on {connection.vendor}')
+
+        self._for_write = True
+        query = self.query.chain(UpdateQuery)
+        query.add_update_values(kwargs)
+        query.clear_select_clause()
+
+        compiler = query.get_compiler(self.db)
+        # Turns filters across joins into "pk IN (subquery)", as execute_sql() would.
+        compiler.pre_sql_setup()
+        sql, params = compiler.as_sql()
+        if not sql:
+            return None
+        return sql, list(params), compiler
+
+    def from_returned_rows(self, rows, compiler) -> list:
+        # ``rows`` hold every concrete column, in field order, as RETURNING produced them.
+        self._result_cache = None
+        fields = self.model._meta.concrete_fields
+        converters = compiler.get_converters([field.get_col(self.model._meta.db_table) for field in fields])
+        if converters:
+            rows = compiler.apply_converters(rows, converters)
+        attnames = [field.attname for field in fields]
+        return [self.model.from_db(self.db, attnames, list(row)) for row in rows]
@@ -0,0 +1,33 @@
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def get_versions(*keys: str, cache_alias: str | None = None) -> tuple:
+    cache = caches[cache_alias or settings.VERSIONS_CACHE_ALIAS]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Seed with a fresh value so an evicted counter never matches an old one.
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return tuple(found[key] for key in keys)
+
+
+def bump_version(key: str, *, using=None, cache_alias: str | None = None) -> None:
+    cache_alias = cache_alias or settings.VERSIONS_CACHE_ALIAS
+    _increment(key, cache_alias)
+    # Bump again once the write is visible so readers cannot re-cache pre-commit state.
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(partial(_increment, key, cache_alias), using=using)
+
+
+def _increment(key: str, cache_alias: str) -> None:
+    cache = caches[cache_alias]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
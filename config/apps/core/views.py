@@ -1,3 +1,16 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from .metrics import registry
+
+
+@require_GET
+def metrics(request):
+    # Metrics expose organization tiers and traffic, so the endpoint stays closed until a token is configured.
+    expected = f'Bearer {settings.METRICS_TOKEN}'
+    if not settings.METRICS_TOKEN or not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
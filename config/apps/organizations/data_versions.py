@@ -0,0 +1,15 @@
+from apps.core import versioning
+
+
+def data_version_key(*, organization_id) -> str:
+    return f'organizations:organization:{organization_id}:data-version'
+
+
+def get_data_version(*, organization_id):
+    # On the shared versions alias, so a write on one worker invalidates every worker's cached responses.
+    (version,) = versioning.get_versions(data_version_key(organization_id=organization_id))
+    return version
+
+
+def bump_data_version(*, organization_id, using=None) -> None:
+    versioning.bump_version(data_version_key(organization_id=organization_id), using=using)
@@ -0,0 +1,90 @@
+import threading
+
+from django.conf import settings
+
+from apps.core import versioning
+from apps.core.cache import LRUCache, ModelSnapshot
+
+
+_memberships = LRUCache(
+    max_entries=settings.ORGANIZATION_MEMBERSHIP_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.ORGANIZATION_MEMBERSHIP_CACHE_TTL_SECONDS,
+)
+
+_stats_lock = threading.Lock()
+_stats = {'invalidations': 0, 'stale': 0}
+
+
+def membership_version_key(*, user_id, organization_id) -> str:
+    return f'organizations:membership:{user_id}:{organization_id}:version'
+
+
+def organization_version_key(*, organization_id) -> str:
+    return f'organizations:organization:{organization_id}:version'
+
+
+def get_membership_versions(*, user_id, organization_id) -> tuple:
+    return versioning.get_versions(
+        membership_version_key(user_id=user_id, organization_id=organization_id),
+        organization_version_key(organization_id=organization_id),
+    )
+
+
+def bump_membership_version(*, user_id, organization_id, using=None) -> None:
+    versioning.bump_version(membership_version_key(user_id=user_id, organization_id=organization_id), using=using)
+    _count('invalidations')
+
+
+def bump_organization_version(*, organization_id, using=None) -> None:
+    versioning.bump_version(organization_version_key(organization_id=organization_id), using=using)
+    _count('invalidations')
+
+
+def get_cached_membership(*, user_id, organization_id):
+    from .models import OrganizationMember
+
+    key = (str(user_id), str(organization_id))
+    versions = get_membership_versions(user_id=key[0], organization_id=key[1])
+
+    cached = _memberships.get(key)
+    if cached is not None:
+        cached_versions, membership_snapshot, organization_snapshot = cached
+        if cached_versions == versions:
+            membership = membership_snapshot.restore()
+            membership.organization = organization_snapshot.restore()
+            return membership
+        _memberships.delete(key)
+        _count('stale')
+
+    membership = OrganizationMember.objects.select_related('organization').get(
+        user_id=key[0],
+        organization_id=key[1],
+    )
+    _memberships.set(
+        key,
+        (versions, ModelSnapshot.capture(membership), ModelSnapshot.capture(membership.organization)),
+    )
+    return membership
+
+
+def stats() -> dict:
+    hits = _memberships.hits - _stats['stale']
+    lookups = _memberships.hits + _memberships.misses
+    return {
+        'entries': len(_memberships),
+        'hits': hits,
+        'misses': lookups - hits,
+        'hit_rate': hits / lookups if lookups else 0.0,
+        'invalidations': _stats['invalidations'],
+        'stale': _stats['stale'],
+        'evictions': _memberships.evictions,
+    }
+
+
+def clear() -> None:
+    _memberships.clear()
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-18 19:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of PERMISSION_BITS / ROLE_PERMISSIONS at the time of this migration.
+PERMISSION_CODES = [
+    'organization:manage',
+    'members:manage',
+    'projects:read',
+    'projects:write',
+    'projects:delete',
+    'tasks:read',
+    'tasks:write',
+    'tasks:delete',
+]
+ROLE_PERMISSIONS = {
+    'owner': PERMISSION_CODES,
+    'manager': [
+        'members:manage',
+        'projects:read',
+        'projects:write',
+        'projects:delete',
+        'tasks:read',
+        'tasks:write',
+        'tasks:delete',
+    ],
+    'member': ['projects:read', 'tasks:read', 'tasks:write'],
+}
+
+
+def _mask_for(permissions) -> int:
+    mask = 0
+    for permission in permissions:
+        if permission in PERMISSION_CODES:
+            mask |= 1 << PERMISSION_CODES.index(permission)
+    return mask
+
+
+def backfill_permission_masks(apps, schema_editor):
+    OrganizationMember = apps.get_model('organizations', 'OrganizationMember')
+
+    members = list(OrganizationMember.objects.only('id', 'role', 'permissions'))
+    for member in members:
+        role_permissions = ROLE_PERMISSIONS.get(member.role, ROLE_PERMISSIONS['member'])
+        extra_permissions = member.permissions if isinstance(member.permissions, list) else []
+        member.permission_mask = _mask_for(role_permissions) | _mask_for(extra_permissions)
+
+    OrganizationMember.objects.bulk_update(members, ['permission_mask'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organizationmember',
+            name='permission_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='organizationmember',
+            index=models.Index(fields=['organization', 'permission_mask'], name='organizatio_organiz_014408_idx'),
+        ),
+        migrations.RunPython(backfill_permission_masks, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,7 @@ from django.utils import timezone
 
 from apps.core.ids import generate_cuid
 from .managers import OrganizationManager, OrganizationMemberManager
+from .membership_cache import bump_membership_version, bump_organization_version
 
 # Create your models here.
 
@@ -31,19 +32,45 @@ class Organization(models.Model):
             models.Index(fields=['is_active']),
         ]
 
+    # is_active as last read from or written to the database; None means unknown.
+    _saved_is_active = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_is_active = instance.__dict__.get('is_active')
+        return instance
+
     def deactivate(self, using=None):
         if not self.is_active:
             return
         self.is_active = False
-        self.deactivated_at = timezone.now()
-        self.save(using=using, update_fields=['is_active', 'deactivated_at'])
+        self.save(using=using, update_fields=['is_active'])
 
     def activate(self, using=None):
         if self.is_active:
             return
         self.is_active = True
-        self.deactivated_at = None
-        self.save(using=using, update_fields=['is_active', 'deactivated_at'])
+        self.save(using=using, update_fields=['is_active'])
+
+    def save(self, *args, **kwargs):
+        # Every path that flips is_active (deactivate(), the admin form, shell edits) revokes cached memberships
+        # and organization tokens, since tenant scoping trusts them to imply an active organization.
+        update_fields = kwargs.get('update_fields')
+        toggled = (
+            not self._state.adding
+            and (update_fields is None or 'is_active' in update_fields)
+            and self.is_active != self._saved_is_active
+        )
+        if toggled:
+            self.deactivated_at = None if self.is_active else (self.deactivated_at or timezone.now())
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'deactivated_at'}
+
+        super().save(*args, **kwargs)
+        self._saved_is_active = self.is_active
+        if toggled:
+            bump_organization_version(organization_id=self.pk, using=kwargs.get('using'))
 
     def __str__(self) -> str:
         return self.name
@@ -80,6 +107,8 @@ class OrganizationMember(models.Model):
     )
     role = models.CharField(max_length=20, choices=Role.choices, default=Role.MEMBER)
     permissions = models.JSONField(default=list, blank=True)
+    # Effective role + explicit permissions as PERMISSION_BITS, kept in sync by save().
+    permission_mask = models.BigIntegerField(default=0, editable=False)
     is_active = models.BooleanField(default=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -98,32 +127,29 @@ class OrganizationMember(models.Model):
         indexes = [
             models.Index(fields=['organization', 'role']),
             models.Index(fields=['organization', 'is_active']),
+            models.Index(fields=['organization', 'permission_mask']),
         ]
 
     @classmethod
     def default_permissions_for_role(cls, role: str):
-        all_permissions = frozenset(p.value for p in cls.Permission)
-        if role == cls.Role.OWNER:
-            return all_permissions
-        if role == cls.Role.MANAGER:
-            return frozenset(
-                {
-                    cls.Permission.MEMBERS_MANAGE,
-                    cls.Permission.PROJECTS_READ,
-                    cls.Permission.PROJECTS_WRITE,
-                    cls.Permission.PROJECTS_DELETE,
-                    cls.Permission.TASKS_READ,
-                    cls.Permission.TASKS_WRITE,
-                    cls.Permission.TASKS_DELETE,
-                }
-            )
-        return frozenset(
-            {
-                cls.Permission.PROJECTS_READ,
-                cls.Permission.TASKS_READ,
-                cls.Permission.TASKS_WRITE,
-            }
-        )
+        return ROLE_PERMISSIONS.get(role, ROLE_PERMISSIONS[cls.Role.MEMBER])
+
+    @classmethod
+    def permission_mask_for(cls, permissions) -> int:
+        mask = 0
+        for permission in permissions:
+            mask |= PERMISSION_BITS.get(permission, 0)
+        return mask
+
+    @classmethod
+    def permissions_from_mask(cls, mask: int) -> frozenset[str]:
+        return frozenset(permission for permission, bit in PERMISSION_BITS.items() if mask & bit)
+
+    def compute_permission_mask(self) -> int:
+        role_mask = ROLE_PERMISSION_MASKS.get(self.role, ROLE_PERMISSION_MASKS[self.Role.MEMBER])
+        if not isinstance(self.permissions, list):
+            return role_mask
+        return role_mask | self.permission_mask_for(self.permissions)
 
     def clean(self):
         super().clean()
@@ -138,16 +164,58 @@ class OrganizationMember(models.Model):
         if unknown:
             raise ValidationError({'permissions': f'Unknown permission codes: {", ".join(sorted(unknown))}'})
 
+    def save(self, *args, **kwargs):
+        self.permission_mask = self.compute_permission_mask()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'role', 'permissions'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'permission_mask'}
+
+        super().save(*args, **kwargs)
+        bump_membership_version(user_id=self.user_id, organization_id=self.organization_id, using=kwargs.get('using'))
+
+    def delete(self, using=None, keep_parents=False):
+        result = super().delete(using=using, keep_parents=keep_parents)
+        bump_membership_version(user_id=self.user_id, organization_id=self.organization_id, using=using)
+        return result
+
     @property
     def effective_permissions(self) -> set[str]:
-        role_perms = set(self.default_permissions_for_role(self.role))
-        extra_perms = set(self.permissions or [])
-        return role_perms | extra_perms
+        return set(self.permissions_from_mask(self.compute_permission_mask()))
 
     def can(self, permission: str) -> bool:
         if not self.is_active or not self.organization.is_active:
             return False
-        return permission in self.effective_permissions
+        return bool(self.permission_mask & PERMISSION_BITS.get(permission, 0))
 
     def __str__(self) -> str:
         return f'{self.organization} / {self.user}'
+
+
+# Bit positions are persisted in OrganizationMember.permission_mask: only ever append permissions.
+PERMISSION_BITS = {permission.value: 1 << index for index, permission in enumerate(OrganizationMember.Permission)}
+
+ROLE_PERMISSIONS = {
+    OrganizationMember.Role.OWNER: frozenset(PERMISSION_BITS),
+    OrganizationMember.Role.MANAGER: frozenset(
+        {
+            OrganizationMember.Permission.MEMBERS_MANAGE,
+            OrganizationMember.Permission.PROJECTS_READ,
+            OrganizationMember.Permission.PROJECTS_WRITE,
+            OrganizationMember.Permission.PROJECTS_DELETE,
+            OrganizationMember.Permission.TASKS_READ,
+            OrganizationMember.Permission.TASKS_WRITE,
+            OrganizationMember.Permission.TASKS_DELETE,
+        }
+    ),
+    OrganizationMember.Role.MEMBER: frozenset(
+        {
+            OrganizationMember.Permission.PROJECTS_READ,
+            OrganizationMember.Permission.TASKS_READ,
+            OrganizationMember.Permission.TASKS_WRITE,
+        }
+    ),
+}
+
+ROLE_PERMISSION_MASKS = {
+    role: OrganizationMember.permission_mask_for(permissions) for role, permissions in ROLE_PERMISSIONS.items()
+}
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 
 
 class OrganizationQuerySet(models.QuerySet):
@@ -12,3 +13,10 @@ class OrganizationQuerySet(models.QuerySet):
 class OrganizationMemberQuerySet(models.QuerySet):
     def active(self):
         return self.filter(is_active=True, organization__is_active=True)
+
+    def with_permission(self, permission: str):
+        bit = self.model.permission_mask_for([permission])
+        if not bit:
+            # Unknown permission: nobody holds it, as in can().
+            return self.none()
+        return self.alias(permission_bit=F('permission_mask').bitand(bit)).filter(permission_bit=bit)
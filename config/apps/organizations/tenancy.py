@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+_tenant = ContextVar('tenant', default=None)
+
+
+@contextmanager
+def tenant_context(resolve_organization_id):
+    """Scope a request to the organization reported by ``resolve_organization_id``.
+
+    The callable must return the organization id only once a membership in that
+    organization has been verified (which implies the organization is active),
+    and ``None`` before then.
+    """
+    token = _tenant.set(resolve_organization_id)
+    try:
+        yield
+    finally:
+        _tenant.reset(token)
+
+
+def get_verified_organization_id() -> str | None:
+    resolve = _tenant.get()
+    return resolve() if resolve is not None else None
+
+
+def filter_active_organization(queryset):
+    organization_id = get_verified_organization_id()
+    if organization_id is None:
+        return queryset.filter(organization__is_active=True)
+    # The membership check already proved this organization is active, so a column
+    # predicate replaces the join and also keeps rows of other tenants out.
+    return queryset.filter(organization_id=organization_id)
@@ -1,3 +1,85 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from apps.accounts.models import User
+from apps.organizations import membership_cache
+from apps.organizations.models import Organization, OrganizationMember
+
+
+class MembershipCacheTests(TestCase):
+    def setUp(self):
+        membership_cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        self.membership = OrganizationMember.objects.create(
+            organization=self.org,
+            user=self.user,
+            role=OrganizationMember.Role.MEMBER,
+        )
+
+    def test_cache_hit_skips_membership_query(self):
+        membership_cache.get_cached_membership(user_id=self.user.pk, organization_id=self.org.pk)
+
+        with self.assertNumQueries(0):
+            membership = membership_cache.get_cached_membership(user_id=self.user.pk, organization_id=self.org.pk)
+
+        self.assertEqual(membership.pk, self.membership.pk)
+        self.assertEqual(membership.organization.slug, 'acme')
+
+    def test_counters_do_not_live_in_the_default_cache(self):
+        membership_cache.get_cached_membership(user_id=self.user.pk, organization_id=self.org.pk)
+        cache.clear()
+
+        with self.assertNumQueries(0):
+            membership_cache.get_cached_membership(user_id=self.user.pk, organization_id=self.org.pk)
+
+    def test_membership_save_invalidates_cached_entry(self):
+        membership_cache.get_cached_membership(user_id=self.user.pk, organization_id=self.org.pk)
+
+        self.membership.role = OrganizationMember.Role.MANAGER
+        self.membership.save(update_fields=['role'])
+
+        membership = membership_cache.get_cached_membership(user_id=self.user.pk, organization_id=self.org.pk)
+        self.assertEqual(membership.role, OrganizationMember.Role.MANAGER)
+
+    def test_organization_deactivation_invalidates_cached_entry(self):
+        membership_cache.get_cached_membership(user_id=self.user.pk, organization_id=self.org.pk)
+
+        self.org.deactivate()
+
+        with self.assertRaises(OrganizationMember.DoesNotExist):
+            membership_cache.get_cached_membership(user_id=self.user.pk, organization_id=self.org.pk)
+
+
+class PermissionMaskTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        self.member = OrganizationMember.objects.create(
+            organization=self.org,
+            user=User.objects.create_user(email='member@example.com', password='password123'),
+            role=OrganizationMember.Role.MEMBER,
+        )
+        self.manager = OrganizationMember.objects.create(
+            organization=self.org,
+            user=User.objects.create_user(email='manager@example.com', password='password123'),
+            role=OrganizationMember.Role.MANAGER,
+        )
+
+    def test_mask_follows_role_and_explicit_permissions(self):
+        self.assertTrue(self.member.can(OrganizationMember.Permission.TASKS_WRITE))
+        self.assertFalse(self.member.can(OrganizationMember.Permission.TASKS_DELETE))
+
+        self.member.permissions = [OrganizationMember.Permission.TASKS_DELETE]
+        self.member.save(update_fields=['permissions'])
+        self.member.refresh_from_db()
+
+        self.assertTrue(self.member.can(OrganizationMember.Permission.TASKS_DELETE))
+        self.assertEqual(self.member.effective_permissions, set(self.member.permissions_from_mask(self.member.permission_mask)))
+
+    def test_with_permission_filters_in_sql(self):
+        members = OrganizationMember.objects.all().with_permission(OrganizationMember.Permission.TASKS_DELETE)
+        self.assertEqual(list(members), [self.manager])
+
+    def test_with_permission_matches_nobody_for_unknown_permissions(self):
+        self.assertFalse(self.manager.can('tasks:archive'))
+        self.assertEqual(list(OrganizationMember.objects.all().with_permission('tasks:archive')), [])
@@ -1,4 +1,5 @@
 from apps.core.managers import SoftDeleteManager
+from apps.organizations.tenancy import filter_active_organization
 
 
 class ProjectManager(SoftDeleteManager):
@@ -15,5 +16,5 @@ class ProjectManager(SoftDeleteManager):
     def get_queryset(self):
         qs = super().get_queryset()
         if self.active_org_only:
-            qs = qs.filter(organization__is_active=True)
+            qs = filter_active_organization(qs)
         return qs
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['organization', 'created_at', 'id'], name='projects_project_keyset_idx'),
+        ),
+    ]
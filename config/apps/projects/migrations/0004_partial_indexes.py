@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_project_task_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['organization', '-created_at', '-id'], name='projects_alive_keyset_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='project',
+            name='projects_project_org_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='project',
+            name='projects_project_keyset_idx',
+        ),
+    ]
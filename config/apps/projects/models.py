@@ -17,6 +17,10 @@ class Project(SoftDeleteModel):
 
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
+    # Alive tasks per status, maintained by apps.tasks.services; `manage.py recount` repairs drift.
+    todo_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
 
     objects = ProjectManager()
     all_objects = ProjectManager(alive_only=False, active_org_only=False)
@@ -24,8 +28,13 @@ class Project(SoftDeleteModel):
     class Meta:
         base_manager_name = 'all_objects'
         default_manager_name = 'objects'
+        # Partial on deleted_at IS NULL, which every default-manager query filters on.
         indexes = [
-            models.Index(fields=['organization'], name='projects_project_org_idx'),
+            models.Index(
+                fields=['organization', '-created_at', '-id'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='projects_alive_keyset_idx',
+            ),
         ]
 
     def __str__(self) -> str:
@@ -1,5 +1,7 @@
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
+from apps.organizations.data_versions import bump_data_version
 from apps.organizations.models import Organization
 
 from .models import Project
@@ -15,11 +17,13 @@ def create_project(
     if not name_value:
         raise ValidationError('Project name is required')
 
-    return Project.objects.create(
+    project = Project.objects.create(
         organization=organization,
         name=name_value,
         description=(description or '').strip(),
     )
+    bump_data_version(organization_id=organization.id)
+    return project
 
 
 def update_project(
@@ -29,27 +33,30 @@ def update_project(
     name: str | None = None,
     description: str | None = None,
 ) -> Project:
-    project = Project.objects.get(id=project_id, organization=organization)
-
-    update_fields: list[str] = []
+    values: dict = {}
 
     if name is not None:
         name_value = name.strip()
         if not name_value:
             raise ValidationError('Project name is required')
-        project.name = name_value
-        update_fields.append('name')
+        values['name'] = name_value
 
     if description is not None:
-        project.description = description
-        update_fields.append('description')
+        values['description'] = description
 
-    if update_fields:
-        project.save(update_fields=update_fields)
+    projects = Project.objects.filter(id=project_id, organization=organization)
+    if not values:
+        return projects.get()
 
-    return project
+    updated = projects.update_returning(updated_at=timezone.now(), **values)
+    if not updated:
+        raise Project.DoesNotExist('Project matching query does not exist.')
+
+    bump_data_version(organization_id=organization.id)
+    return updated[0]
 
 
 def delete_project(*, organization: Organization, project_id: str) -> None:
     project = Project.objects.get(id=project_id, organization=organization)
     project.delete()
+    bump_data_version(organization_id=organization.id)
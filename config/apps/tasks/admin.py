@@ -25,7 +25,7 @@ class TaskAdmin(admin.ModelAdmin):
         'description',
         'assignee_email',
         'project__name',
-        'project__organization__name',
+        'organization__name',
     )
     autocomplete_fields = ('project',)
     ordering = ('-created_at',)
@@ -0,0 +1,165 @@
+from collections import Counter
+
+from django.db import connections, transaction
+from django.db.models import Case, Count, F, IntegerField, Value, When
+
+from apps.projects.models import Project
+
+from .models import Task, TaskComment
+
+
+TASK_COUNT_FIELDS = {
+    Task.Status.TODO: 'todo_count',
+    Task.Status.IN_PROGRESS: 'in_progress_count',
+    Task.Status.DONE: 'done_count',
+}
+
+
+def adjust_task_counts(deltas: Counter) -> None:
+    """Apply ``{(project_id, status): delta}`` to the project counters in a single UPDATE."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    updates = {}
+    for status, field in TASK_COUNT_FIELDS.items():
+        whens = [
+            When(id=project_id, then=Value(delta))
+            for (project_id, task_status), delta in deltas.items()
+            if task_status == status
+        ]
+        if whens:
+            updates[field] = F(field) + Case(*whens, default=Value(0), output_field=IntegerField())
+    Project.all_objects.filter(id__in={project_id for project_id, _status in deltas}).update(**updates)
+
+
+def update_task_returning(tasks, *, task_id: str, **values) -> list[Task]:
+    """``tasks.update_returning(**values)`` that also moves the task between its old and new project counters.
+
+    On PostgreSQL the previous row, the update and the counter deltas are one statement; other databases lock the
+    previous row first and adjust the counters afterwards.
+    """
+    if connections[tasks.db].vendor == 'postgresql':
+        return _update_task_returning_with_counts(tasks, task_id=task_id, **values)
+
+    with transaction.atomic(using=tasks.db):
+        previous = (
+            Task.objects.using(tasks.db).select_for_update(of=('self',))
+            .filter(id=task_id)
+            .values_list('project_id', 'status')
+            .first()
+        )
+        updated = tasks.update_returning(**values)
+        if updated:
+            deltas = Counter()
+            deltas[previous] -= 1
+            deltas[updated[0].project_id, updated[0].status] += 1
+            adjust_task_counts(deltas)
+    return updated
+
+
+def _update_task_returning_with_counts(tasks, *, task_id: str, **values) -> list[Task]:
+    compiled = tasks.compile_update(**values)
+    if compiled is None:
+        return []
+    sql, params, compiler = compiled
+    # Django's UPDATE has no FROM clause and no subqueries in SET, so its first WHERE is the top-level one.
+    update, _where, condition = sql.partition(' WHERE ')
+
+    connection = connections[tasks.db]
+    qn = connection.ops.quote_name
+    task_table, project_table = qn(Task._meta.db_table), qn(Project._meta.db_table)
+    task_pk, project_pk = qn(Task._meta.pk.column), qn(Project._meta.pk.column)
+    project, status = qn(Task._meta.get_field('project').column), qn(Task._meta.get_field('status').column)
+    columns = [qn(field.column) for field in Task._meta.concrete_fields]
+    counts = [qn(Project._meta.get_field(field).column) for field in TASK_COUNT_FIELDS.values()]
+
+    returning = ', '.join(f'{task_table}.{column}' for column in columns)
+    sums = ', '.join(f'SUM(CASE WHEN status = %s THEN delta ELSE 0 END) AS {count}' for count in counts)
+    assignments = ', '.join(f'{count} = {project_table}.{count} + deltas.{count}' for count in counts)
+    changed = ' OR '.join(f'deltas.{count} <> 0' for count in counts)
+    statement = (
+        f'WITH previous AS (SELECT {task_pk}, {project}, {status} FROM {task_table} WHERE {task_pk} = %s FOR UPDATE), '
+        f'moved AS ({update} FROM previous WHERE {task_table}.{task_pk} = previous.{task_pk}'
+        f'{f" AND ({condition})" if condition else ""} '
+        f'RETURNING {returning}, previous.{project} AS previous_project_id, previous.{status} AS previous_status), '
+        f'changes AS (SELECT previous_project_id AS project_id, previous_status AS status, -1 AS delta FROM moved '
+        f'UNION ALL SELECT {project}, {status}, 1 FROM moved), '
+        f'counted AS (UPDATE {project_table} SET {assignments} '
+        f'FROM (SELECT project_id, {sums} FROM changes GROUP BY project_id) AS deltas '
+        f'WHERE {project_table}.{project_pk} = deltas.project_id AND ({changed})) '
+        f'SELECT {", ".join(columns)} FROM moved'
+    )
+    with transaction.mark_for_rollback_on_error(using=tasks.db):
+        with connection.cursor() as cursor:
+            cursor.execute(statement, [task_id, *params, *TASK_COUNT_FIELDS])
+            rows = cursor.fetchall()
+    return tasks.from_returned_rows(rows, compiler)
+
+
+def adjust_comment_count(*, task_id: str, delta: int) -> None:
+    Task.all_objects.filter(id=task_id).update(comment_count=F('comment_count') + delta)
+
+
+def recount_projects(*, batch_size: int) -> int:
+    repaired = 0
+    for project_ids in _batches(Project.all_objects.all(), batch_size):
+        with transaction.atomic():
+            # Lock first: writers update counters after their task rows, so they wait for this batch to finish.
+            projects = list(Project.all_objects.select_for_update().filter(id__in=project_ids))
+            counts = Counter()
+            for row in (
+                Task.all_objects.filter(project_id__in=project_ids, deleted_at__isnull=True)
+                .order_by()
+                .values('project_id', 'status')
+                .annotate(count=Count('id'))
+            ):
+                counts[row['project_id'], row['status']] = row['count']
+
+            drifted = []
+            for project in projects:
+                actual = {field: counts[project.id, status] for status, field in TASK_COUNT_FIELDS.items()}
+                if any(getattr(project, field) != value for field, value in actual.items()):
+                    for field, value in actual.items():
+                        setattr(project, field, value)
+                    drifted.append(project)
+            Project.all_objects.bulk_update(drifted, list(TASK_COUNT_FIELDS.values()))
+            repaired += len(drifted)
+    return repaired
+
+
+def recount_tasks(*, batch_size: int) -> int:
+    repaired = 0
+    for task_ids in _batches(Task.all_objects.all(), batch_size):
+        with transaction.atomic():
+            tasks = list(Task.all_objects.select_for_update().filter(id__in=task_ids).only('id', 'comment_count'))
+            counts = dict(
+                TaskComment.all_objects.filter(task_id__in=task_ids, deleted_at__isnull=True)
+                .order_by()
+                .values('task_id')
+                .annotate(count=Count('id'))
+                .values_list('task_id', 'count')
+            )
+
+            drifted = []
+            for task in tasks:
+                if task.comment_count != counts.get(task.id, 0):
+                    task.comment_count = counts.get(task.id, 0)
+                    drifted.append(task)
+            Task.all_objects.bulk_update(drifted, ['comment_count'])
+            repaired += len(drifted)
+    return repaired
+
+
+def _batches(queryset, batch_size: int):
+    # Keyset pagination on the primary key; every batch is its own short transaction.
+    last_id = None
+    while True:
+        page = queryset.order_by('id')
+        if last_id is not None:
+            page = page.filter(id__gt=last_id)
+        ids = list(page.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
@@ -0,0 +1,36 @@
+from functools import partial
+
+from django.db import transaction
+
+from apps.core.pubsub import get_broker
+
+from .models import Task, TaskComment
+
+
+class TaskAction:
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+
+
+def task_channel(*, organization_id) -> str:
+    return f'tasks:organization:{organization_id}:tasks'
+
+
+def comment_channel(*, organization_id) -> str:
+    return f'tasks:organization:{organization_id}:comments'
+
+
+def tasks_changed(*, organization_id, tasks: list[Task], action: str) -> None:
+    events = [{'action': action, 'task_id': task.id, 'project_id': task.project_id} for task in tasks]
+    _publish_on_commit(task_channel(organization_id=organization_id), events)
+
+
+def comment_added(*, organization_id, comment: TaskComment) -> None:
+    events = [{'comment_id': comment.id, 'task_id': comment.task_id}]
+    _publish_on_commit(comment_channel(organization_id=organization_id), events)
+
+
+def _publish_on_commit(channel: str, events: list[dict]) -> None:
+    # Subscribers must never be told about a write that is later rolled back.
+    transaction.on_commit(partial(get_broker().publish, channel, events))
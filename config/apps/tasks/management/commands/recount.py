@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute project task counters and task comment counters, repairing any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, batch_size: int, **options):
+        projects = counters.recount_projects(batch_size=batch_size)
+        tasks = counters.recount_tasks(batch_size=batch_size)
+        self.stdout.write(f'Repaired {projects} project(s) and {tasks} task(s).')
@@ -1,4 +1,5 @@
 from apps.core.managers import SoftDeleteManager
+from apps.organizations.tenancy import filter_active_organization
 
 
 class TaskManager(SoftDeleteManager):
@@ -19,7 +20,7 @@ class TaskManager(SoftDeleteManager):
         if self.active_project_only:
             qs = qs.filter(project__deleted_at__isnull=True)
         if self.active_org_only:
-            qs = qs.filter(project__organization__is_active=True)
+            qs = filter_active_organization(qs)
         return qs
 
 
@@ -45,5 +46,5 @@ class TaskCommentManager(SoftDeleteManager):
         if self.active_project_only:
             qs = qs.filter(task__project__deleted_at__isnull=True)
         if self.active_org_only:
-            qs = qs.filter(task__project__organization__is_active=True)
+            qs = filter_active_organization(qs)
         return qs
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_due_date'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='taskcomment',
+            name='tasks_taskc_task_id_3f97e8_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'created_at', 'id'], name='tasks_task_project_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskcomment',
+            index=models.Index(fields=['task', 'created_at', 'id'], name='tasks_comment_task_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-18 19:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+TASK_COUNT_FIELDS = {
+    'todo': 'todo_count',
+    'in_progress': 'in_progress_count',
+    'done': 'done_count',
+}
+
+
+def _count(queryset, field: str):
+    counts = queryset.order_by().values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('tasks', 'Task')
+    TaskComment = apps.get_model('tasks', 'TaskComment')
+
+    alive_tasks = Task._base_manager.filter(project=OuterRef('pk'), deleted_at__isnull=True)
+    Project._base_manager.update(
+        **{field: _count(alive_tasks.filter(status=status), 'project') for status, field in TASK_COUNT_FIELDS.items()}
+    )
+    alive_comments = TaskComment._base_manager.filter(task=OuterRef('pk'), deleted_at__isnull=True)
+    Task._base_manager.update(comment_count=_count(alive_comments, 'task'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_project_task_counts'),
+        ('tasks', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='comment_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 6.0 on 2026-10-18 19:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+BATCH_SIZE = 1000
+
+
+def _backfill(model, **values):
+    # Small keyset batches, each committed on its own, so no long lock is held on large tables.
+    manager = model._base_manager
+    last_id = ''
+    while True:
+        ids = list(
+            manager.filter(pk__gt=last_id, organization__isnull=True)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            return
+        manager.filter(pk__in=ids).update(**values)
+        last_id = ids[-1]
+
+
+def backfill_organizations(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('tasks', 'Task')
+    TaskComment = apps.get_model('tasks', 'TaskComment')
+
+    _backfill(
+        Task,
+        organization_id=Subquery(Project._base_manager.filter(pk=OuterRef('project_id')).values('organization_id')),
+    )
+    _backfill(
+        TaskComment,
+        organization_id=Subquery(Task._base_manager.filter(pk=OuterRef('task_id')).values('organization_id')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('organizations', '0002_member_permission_mask'),
+        ('projects', '0003_project_task_counts'),
+        ('tasks', '0004_task_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='organization',
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='tasks',
+                to='organizations.organization',
+            ),
+        ),
+        migrations.AddField(
+            model_name='taskcomment',
+            name='organization',
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='task_comments',
+                to='organizations.organization',
+            ),
+        ),
+        migrations.RunPython(backfill_organizations, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='task',
+            name='organization',
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='tasks',
+                to='organizations.organization',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='taskcomment',
+            name='organization',
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='task_comments',
+                to='organizations.organization',
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-18 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_organization'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['organization', '-created_at', '-id'], name='tasks_alive_org_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['project', '-created_at', '-id'], name='tasks_alive_project_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['project', 'status'], name='tasks_alive_project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskcomment',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['task', 'created_at', 'id'], name='comments_alive_keyset_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_project_b78682_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_project_keyset_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='taskcomment',
+            name='tasks_comment_task_keyset_idx',
+        ),
+    ]
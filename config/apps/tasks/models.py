@@ -2,6 +2,7 @@ from django.conf import settings
 from django.db import models
 
 from apps.core.models import SoftDeleteModel
+from apps.organizations.models import Organization
 from apps.projects.models import Project
 
 from .managers import TaskCommentManager, TaskManager
@@ -20,12 +21,20 @@ class Task(SoftDeleteModel):
         on_delete=models.PROTECT,
         related_name='tasks',
     )
+    # Copied from the project so tenant filters do not have to join through it.
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.PROTECT,
+        related_name='tasks',
+        editable=False,
+    )
 
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.TODO)
     due_date = models.DateField(null=True, blank=True)
     assignee_email = models.EmailField(blank=True)
+    comment_count = models.IntegerField(default=0)
 
     objects = TaskManager()
     all_objects = TaskManager(alive_only=False, active_org_only=False, active_project_only=False)
@@ -33,14 +42,44 @@ class Task(SoftDeleteModel):
     class Meta:
         base_manager_name = 'all_objects'
         default_manager_name = 'objects'
+        # Partial on deleted_at IS NULL, which every default-manager query filters on.
         indexes = [
-            models.Index(fields=['project', 'status']),
+            models.Index(
+                fields=['organization', '-created_at', '-id'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='tasks_alive_org_keyset_idx',
+            ),
+            models.Index(
+                fields=['project', '-created_at', '-id'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='tasks_alive_project_keyset_idx',
+            ),
+            models.Index(
+                fields=['project', 'status'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='tasks_alive_project_status_idx',
+            ),
         ]
         ordering = ['-created_at']
 
     def __str__(self) -> str:
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Tenant filters read organization_id, so it follows the project whichever path moved the task.
+        update_fields = kwargs.get('update_fields')
+        moves = self.project_id is not None and (update_fields is None or 'project' in update_fields)
+        if moves:
+            self.organization_id = self.project.organization_id
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'organization'}
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if moves and not adding:
+            TaskComment.all_objects.filter(task_id=self.pk).exclude(organization_id=self.organization_id).update(
+                organization_id=self.organization_id
+            )
+
 
 class TaskComment(SoftDeleteModel):
     task = models.ForeignKey(
@@ -48,6 +87,12 @@ class TaskComment(SoftDeleteModel):
         on_delete=models.PROTECT,
         related_name='comments',
     )
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.PROTECT,
+        related_name='task_comments',
+        editable=False,
+    )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.PROTECT,
@@ -67,9 +112,21 @@ class TaskComment(SoftDeleteModel):
         base_manager_name = 'all_objects'
         default_manager_name = 'objects'
         indexes = [
-            models.Index(fields=['task', 'created_at']),
+            models.Index(
+                fields=['task', 'created_at', 'id'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='comments_alive_keyset_idx',
+            ),
         ]
         ordering = ['created_at']
 
     def __str__(self) -> str:
         return f'Comment on {self.task_id}'
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.task_id is not None and (update_fields is None or 'task' in update_fields):
+            self.organization_id = self.task.organization_id
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'organization'}
+        super().save(*args, **kwargs)
@@ -1,4 +1,5 @@
-from django.db.models import QuerySet
+from django.db.models import Count, Q, QuerySet
+from django.utils import timezone
 
 from apps.organizations.models import Organization
 
@@ -6,25 +7,78 @@ from .models import Task, TaskComment
 
 
 def list_tasks(*, organization: Organization, project_id: str | None = None) -> QuerySet[Task]:
-    qs = Task.objects.select_related('project').filter(project__organization=organization)
+    qs = Task.objects.select_related('project').filter(organization=organization)
     if project_id:
         qs = qs.filter(project_id=project_id)
     return qs.order_by('-created_at')
 
 
 def get_task(*, organization: Organization, task_id: str) -> Task:
-    return Task.objects.select_related('project').get(id=task_id, project__organization=organization)
+    return Task.objects.select_related('project').get(id=task_id, organization=organization)
 
 
 def list_task_comments(*, organization: Organization, task_id: str) -> QuerySet[TaskComment]:
     return TaskComment.objects.select_related('task', 'author').filter(
         task_id=task_id,
-        task__project__organization=organization,
+        organization=organization,
     )
 
 
 def get_task_comment(*, organization: Organization, comment_id: str) -> TaskComment:
     return TaskComment.objects.select_related('task', 'author').get(
         id=comment_id,
-        task__project__organization=organization,
+        organization=organization,
     )
+
+
+class TaskStats:
+    def __init__(self):
+        self.total = 0
+        self.overdue = 0
+        self.by_status = dict.fromkeys(Task.Status.values, 0)
+        self.by_assignee: dict[str, int] = {}
+
+    def add(self, *, status: str, assignee_email: str, count: int, overdue: int) -> None:
+        self.total += count
+        self.overdue += overdue
+        self.by_status[status] = self.by_status.get(status, 0) + count
+        self.by_assignee[assignee_email] = self.by_assignee.get(assignee_email, 0) + count
+
+
+def _task_stat_rows(queryset: QuerySet[Task], *group_by: str):
+    # One GROUP BY over (project, status[, assignee]); every breakdown is rolled up from these rows.
+    overdue = Q(due_date__lt=timezone.localdate()) & ~Q(status=Task.Status.DONE)
+    return (
+        queryset.order_by()
+        .values(*group_by, 'status', 'assignee_email')
+        .annotate(count=Count('id'), overdue=Count('id', filter=overdue))
+    )
+
+
+def get_task_stats(*, organization: Organization, project_id: str | None = None) -> TaskStats:
+    qs = Task.objects.filter(organization=organization)
+    if project_id:
+        qs = qs.filter(project_id=project_id)
+
+    stats = TaskStats()
+    for row in _task_stat_rows(qs):
+        stats.add(
+            status=row['status'],
+            assignee_email=row['assignee_email'],
+            count=row['count'],
+            overdue=row['overdue'],
+        )
+    return stats
+
+
+def get_task_stats_by_project(*, organization: Organization, project_ids) -> dict[str, TaskStats]:
+    stats = {project_id: TaskStats() for project_id in project_ids}
+    qs = Task.objects.filter(organization=organization, project_id__in=stats)
+    for row in _task_stat_rows(qs, 'project_id'):
+        stats[row['project_id']].add(
+            status=row['status'],
+            assignee_email=row['assignee_email'],
+            count=row['count'],
+            overdue=row['overdue'],
+        )
+    return stats
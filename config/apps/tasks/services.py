@@ -1,14 +1,23 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists
+from django.utils import timezone
 
+from apps.organizations.data_versions import bump_data_version
 from apps.organizations.models import Organization
 from apps.projects.models import Project
 
+from . import counters, events
 from .models import Task, TaskComment
 
 
 UNSET = object()
 
 
+@transaction.atomic
 def create_task(
     *,
     organization: Organization,
@@ -29,14 +38,19 @@ def create_task(
     if status_value not in Task.Status.values:
         raise ValidationError('Invalid task status')
 
-    return Task.objects.create(
+    task = Task.objects.create(
         project=project,
+        organization=organization,
         title=title_value,
         description=(description or '').strip(),
         status=status_value,
         due_date=due_date,
         assignee_email=(assignee_email or '').strip(),
     )
+    counters.adjust_task_counts(Counter({(project.id, task.status): 1}))
+    bump_data_version(organization_id=organization.id)
+    events.tasks_changed(organization_id=organization.id, tasks=[task], action=events.TaskAction.CREATED)
+    return task
 
 
 def update_task(
@@ -50,63 +64,229 @@ def update_task(
     due_date=UNSET,
     assignee_email: str | None = None,
 ) -> Task:
-    task = Task.objects.select_related('project').get(id=task_id, project__organization=organization)
-
-    update_fields: list[str] = []
-
-    if project_id is not None:
-        project = Project.objects.get(id=project_id, organization=organization)
-        task.project = project
-        update_fields.append('project')
+    values: dict = {}
 
     if title is not None:
         title_value = title.strip()
         if not title_value:
             raise ValidationError('Task title is required')
-        task.title = title_value
-        update_fields.append('title')
+        values['title'] = title_value
 
     if description is not None:
-        task.description = description
-        update_fields.append('description')
+        values['description'] = description
 
     if status is not None:
         if status not in Task.Status.values:
             raise ValidationError('Invalid task status')
-        task.status = status
-        update_fields.append('status')
+        values['status'] = status
 
     if due_date is not UNSET:
-        task.due_date = due_date
-        update_fields.append('due_date')
+        values['due_date'] = due_date
 
     if assignee_email is not None:
-        task.assignee_email = assignee_email
-        update_fields.append('assignee_email')
+        values['assignee_email'] = assignee_email
+
+    tasks = Task.objects.filter(id=task_id, organization=organization)
+    if project_id is not None:
+        values['project_id'] = project_id
+        values['organization_id'] = organization.id
+        tasks = tasks.filter(Exists(Project.objects.filter(id=project_id, organization=organization)))
+
+    if not values:
+        return Task.objects.select_related('project').get(id=task_id, organization=organization)
+
+    values['updated_at'] = timezone.now()
+    if 'status' in values or 'project_id' in values:
+        # The task moves between project counters, so those change with it.
+        updated = counters.update_task_returning(tasks, task_id=task_id, **values)
+    else:
+        updated = tasks.update_returning(**values)
+    if not updated:
+        if project_id is not None and Task.objects.filter(id=task_id, organization=organization).exists():
+            raise Project.DoesNotExist('Project matching query does not exist.')
+        raise Task.DoesNotExist('Task matching query does not exist.')
+
+    bump_data_version(organization_id=organization.id)
+    events.tasks_changed(organization_id=organization.id, tasks=updated, action=events.TaskAction.UPDATED)
+    return updated[0]
+
+
+@transaction.atomic
+def delete_task(*, organization: Organization, task_id: str) -> None:
+    # Counters follow the row the soft delete changed, so a concurrent move or a second delete cannot skew them.
+    deleted = Task.objects.filter(id=task_id, organization=organization).update_returning(deleted_at=timezone.now())
+    if not deleted:
+        raise Task.DoesNotExist('Task matching query does not exist.')
+    counters.adjust_task_counts(Counter({(deleted[0].project_id, deleted[0].status): -1}))
+    bump_data_version(organization_id=organization.id)
+    events.tasks_changed(organization_id=organization.id, tasks=deleted, action=events.TaskAction.DELETED)
 
-    if update_fields:
-        task.save(update_fields=update_fields)
 
-    return task
+class BulkTaskResult:
+    def __init__(self, *, tasks: list[Task], errors: list[tuple[int, str | None, str]]):
+        self.tasks = tasks
+        self.errors = errors
 
 
-def delete_task(*, organization: Organization, task_id: str) -> None:
-    task = Task.objects.get(id=task_id, project__organization=organization)
-    task.delete()
+def _check_bulk_size(items) -> None:
+    if len(items) > settings.TASKS_BULK_MAX_ITEMS:
+        raise ValidationError(f'At most {settings.TASKS_BULK_MAX_ITEMS} tasks can be changed at once')
+
+
+def _projects_by_id(*, organization: Organization, project_ids) -> dict[str, Project]:
+    project_ids = {project_id for project_id in project_ids if project_id}
+    if not project_ids:
+        return {}
+    return Project.objects.filter(organization=organization, id__in=project_ids).in_bulk()
 
 
+@transaction.atomic
+def bulk_create_tasks(*, organization: Organization, items: list[dict]) -> BulkTaskResult:
+    _check_bulk_size(items)
+    projects = _projects_by_id(organization=organization, project_ids=(item.get('project_id') for item in items))
+
+    tasks: list[Task] = []
+    errors: list[tuple[int, str | None, str]] = []
+    for index, item in enumerate(items):
+        title_value = (item.get('title') or '').strip()
+        status_value = item.get('status') or Task.Status.TODO
+        project = projects.get(item.get('project_id'))
+
+        if not title_value:
+            errors.append((index, None, 'Task title is required'))
+        elif status_value not in Task.Status.values:
+            errors.append((index, None, 'Invalid task status'))
+        elif project is None:
+            errors.append((index, None, 'Project not found'))
+        else:
+            tasks.append(
+                Task(
+                    project=project,
+                    organization=organization,
+                    title=title_value,
+                    description=(item.get('description') or '').strip(),
+                    status=status_value,
+                    due_date=item.get('due_date'),
+                    assignee_email=(item.get('assignee_email') or '').strip(),
+                )
+            )
+
+    if tasks:
+        Task.objects.bulk_create(tasks)
+        counters.adjust_task_counts(Counter((task.project_id, task.status) for task in tasks))
+        bump_data_version(organization_id=organization.id)
+        events.tasks_changed(organization_id=organization.id, tasks=tasks, action=events.TaskAction.CREATED)
+    return BulkTaskResult(tasks=tasks, errors=errors)
+
+
+@transaction.atomic
+def bulk_update_tasks(*, organization: Organization, items: list[dict]) -> BulkTaskResult:
+    _check_bulk_size(items)
+    existing = (
+        Task.objects.select_for_update(of=('self',))
+        .filter(id__in={item.get('id') for item in items}, organization=organization)
+        .in_bulk()
+    )
+    projects = _projects_by_id(organization=organization, project_ids=(item.get('project_id') for item in items))
+
+    now = timezone.now()
+    tasks: list[Task] = []
+    errors: list[tuple[int, str | None, str]] = []
+    groups: dict[tuple[str, ...], list[Task]] = defaultdict(list)
+    deltas = Counter()
+    seen: set[str] = set()
+    for index, item in enumerate(items):
+        task = existing.get(item.get('id'))
+        if task is None:
+            errors.append((index, item.get('id'), 'Task not found'))
+            continue
+        if task.id in seen:
+            errors.append((index, task.id, 'Task is listed more than once'))
+            continue
+        seen.add(task.id)
+        previous = (task.project_id, task.status)
+
+        update_fields: list[str] = []
+        if item.get('project_id') is not None:
+            project = projects.get(item['project_id'])
+            if project is None:
+                errors.append((index, task.id, 'Project not found'))
+                continue
+            task.project = project
+            task.organization = organization
+            update_fields.extend(['project', 'organization'])
+
+        if item.get('status') is not None:
+            if item['status'] not in Task.Status.values:
+                errors.append((index, task.id, 'Invalid task status'))
+                continue
+            task.status = item['status']
+            update_fields.append('status')
+
+        if 'due_date' in item:
+            task.due_date = item['due_date']
+            update_fields.append('due_date')
+
+        if item.get('assignee_email') is not None:
+            task.assignee_email = item['assignee_email'].strip()
+            update_fields.append('assignee_email')
+
+        if update_fields:
+            task.updated_at = now
+            groups[tuple(update_fields)].append(task)
+            deltas[previous] -= 1
+            deltas[task.project_id, task.status] += 1
+        tasks.append(task)
+
+    # One UPDATE per distinct combination of changed fields, at most a handful per call.
+    for update_fields, group in groups.items():
+        Task.objects.bulk_update(group, [*update_fields, 'updated_at'])
+    counters.adjust_task_counts(deltas)
+    if groups:
+        bump_data_version(organization_id=organization.id)
+        changed = [task for group in groups.values() for task in group]
+        events.tasks_changed(organization_id=organization.id, tasks=changed, action=events.TaskAction.UPDATED)
+    return BulkTaskResult(tasks=tasks, errors=errors)
+
+
+@transaction.atomic
+def bulk_delete_tasks(*, organization: Organization, task_ids: list[str]) -> BulkTaskResult:
+    _check_bulk_size(task_ids)
+    deleted = Task.objects.filter(id__in=set(task_ids), organization=organization).update_returning(
+        deleted_at=timezone.now()
+    )
+    deleted_ids = {task.id for task in deleted}
+
+    errors = [
+        (index, task_id, 'Task not found') for index, task_id in enumerate(task_ids) if task_id not in deleted_ids
+    ]
+    if deleted:
+        deltas = Counter()
+        deltas.subtract((task.project_id, task.status) for task in deleted)
+        counters.adjust_task_counts(deltas)
+        bump_data_version(organization_id=organization.id)
+        events.tasks_changed(organization_id=organization.id, tasks=deleted, action=events.TaskAction.DELETED)
+    return BulkTaskResult(tasks=[], errors=errors)
+
+
+@transaction.atomic
 def create_task_comment(*, organization: Organization, task_id: str, author, content: str) -> TaskComment:
     content_value = content.strip()
     if not content_value:
         raise ValidationError('Comment content is required')
 
-    task = Task.objects.select_related('project').get(id=task_id, project__organization=organization)
+    task = Task.objects.select_related('project').get(id=task_id, organization=organization)
 
-    return TaskComment.objects.create(
+    comment = TaskComment.objects.create(
         task=task,
+        organization=organization,
         author=author,
         content=content_value,
     )
+    counters.adjust_comment_count(task_id=task.id, delta=1)
+    bump_data_version(organization_id=organization.id)
+    events.comment_added(organization_id=organization.id, comment=comment)
+    return comment
 
 
 def update_task_comment(*, organization: Organization, comment_id: str, content: str) -> TaskComment:
@@ -114,16 +294,23 @@ def update_task_comment(*, organization: Organization, comment_id: str, content:
     if not content_value:
         raise ValidationError('Comment content is required')
 
-    comment = TaskComment.objects.select_related('task', 'author').get(
+    updated = TaskComment.objects.filter(
         id=comment_id,
-        task__project__organization=organization,
-    )
+        organization=organization,
+    ).update_returning(content=content_value, updated_at=timezone.now())
+    if not updated:
+        raise TaskComment.DoesNotExist('TaskComment matching query does not exist.')
 
-    comment.content = content_value
-    comment.save(update_fields=['content'])
-    return comment
+    bump_data_version(organization_id=organization.id)
+    return updated[0]
 
 
+@transaction.atomic
 def delete_task_comment(*, organization: Organization, comment_id: str) -> None:
-    comment = TaskComment.objects.get(id=comment_id, task__project__organization=organization)
-    comment.delete()
+    deleted = TaskComment.objects.filter(id=comment_id, organization=organization).update_returning(
+        deleted_at=timezone.now()
+    )
+    if not deleted:
+        raise TaskComment.DoesNotExist('TaskComment matching query does not exist.')
+    counters.adjust_comment_count(task_id=deleted[0].task_id, delta=-1)
+    bump_data_version(organization_id=organization.id)
@@ -1,3 +1,336 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.api import token_cache
+from apps.api.jwt import create_access_token
+from apps.organizations.models import Organization, OrganizationMember
+from apps.organizations.tenancy import tenant_context
+from apps.projects import selectors as project_selectors
+from apps.projects.models import Project
+
+from . import selectors, services
+from .models import Task, TaskComment
+
+
+class BulkTaskServiceTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        self.project = Project.objects.create(organization=self.org, name='Board')
+        self.other_project = Project.objects.create(organization=self.org, name='Archive')
+
+    def _create(self, count: int) -> list[Task]:
+        items = [{'project_id': self.project.id, 'title': f'Task {i}'} for i in range(count)]
+        return services.bulk_create_tasks(organization=self.org, items=items).tasks
+
+    def test_bulk_update_runs_a_constant_number_of_statements(self):
+        tasks = self._create(30)
+        items = [{'id': task.id, 'status': Task.Status.DONE, 'project_id': self.other_project.id} for task in tasks]
+
+        # SAVEPOINT, task lookup, project lookup, one UPDATE, one counter UPDATE, RELEASE.
+        with self.assertNumQueries(6):
+            result = services.bulk_update_tasks(organization=self.org, items=items)
+
+        self.assertEqual(result.errors, [])
+        self.assertEqual(Task.objects.filter(project=self.other_project, status=Task.Status.DONE).count(), 30)
+
+    def test_invalid_items_are_reported_without_blocking_the_rest(self):
+        result = services.bulk_create_tasks(
+            organization=self.org,
+            items=[
+                {'project_id': self.project.id, 'title': 'Valid'},
+                {'project_id': self.project.id, 'title': ' '},
+                {'project_id': 'missing', 'title': 'Orphan'},
+            ],
+        )
+        self.assertEqual([task.title for task in result.tasks], ['Valid'])
+        self.assertEqual(
+            result.errors,
+            [(1, None, 'Task title is required'), (2, None, 'Project not found')],
+        )
+
+        deleted = services.bulk_delete_tasks(organization=self.org, task_ids=[result.tasks[0].id, 'missing'])
+        self.assertEqual(deleted.errors, [(1, 'missing', 'Task not found')])
+        self.assertFalse(Task.objects.filter(id=result.tasks[0].id).exists())
+
+
+class UpdateReturningTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        self.project = Project.objects.create(organization=self.org, name='Board')
+        self.other_project = Project.objects.create(organization=self.org, name='Archive')
+        self.task = Task.objects.create(project=self.project, title='Task')
+
+    @skipUnless(connection.vendor == 'postgresql', 'Counter deltas share the UPDATE only on PostgreSQL')
+    def test_update_task_is_a_single_statement(self):
+        task = services.create_task(organization=self.org, project_id=self.project.id, title='Task')
+        with self.assertNumQueries(1):
+            updated = services.update_task(
+                organization=self.org,
+                task_id=task.id,
+                project_id=self.other_project.id,
+                status=Task.Status.DONE,
+                due_date=datetime.date(2030, 1, 31),
+            )
+
+        self.assertEqual(updated.project_id, self.other_project.id)
+        self.assertEqual(updated.due_date, datetime.date(2030, 1, 31))
+        self.assertGreater(updated.updated_at, task.updated_at)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.DONE)
+        self.project.refresh_from_db()
+        self.other_project.refresh_from_db()
+        self.assertEqual((self.project.todo_count, self.other_project.done_count), (0, 1))
+
+    def test_field_updates_are_a_single_statement(self):
+        with self.assertNumQueries(1):
+            task = services.update_task(
+                organization=self.org,
+                task_id=self.task.id,
+                title='Renamed',
+                due_date=datetime.date(2030, 1, 31),
+            )
+
+        self.assertEqual(task.title, 'Renamed')
+        self.assertEqual(task.due_date, datetime.date(2030, 1, 31))
+        self.assertGreater(task.updated_at, self.task.updated_at)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Renamed')
+
+    def test_missing_rows_are_reported_from_the_row_count(self):
+        other_org = Organization.objects.create(name='Other', slug='other', contact_email='billing@other.com')
+        foreign_project = Project.objects.create(organization=other_org, name='Foreign')
+
+        with self.assertRaises(Task.DoesNotExist):
+            services.update_task(organization=other_org, task_id=self.task.id, title='Stolen')
+        with self.assertRaises(Project.DoesNotExist):
+            services.update_task(organization=self.org, task_id=self.task.id, project_id=foreign_project.id)
+
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.project_id), ('Task', self.project.id))
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        self.project = Project.objects.create(organization=self.org, name='Board')
+        self.other_project = Project.objects.create(organization=self.org, name='Archive')
+
+    def _counts(self, project):
+        project.refresh_from_db()
+        return project.todo_count, project.in_progress_count, project.done_count
+
+    def test_services_keep_counters_in_step(self):
+        task = services.create_task(organization=self.org, project_id=self.project.id, title='Task')
+        services.bulk_create_tasks(
+            organization=self.org,
+            items=[{'project_id': self.project.id, 'title': 'Bulk', 'status': Task.Status.IN_PROGRESS}],
+        )
+        services.update_task(
+            organization=self.org,
+            task_id=task.id,
+            project_id=self.other_project.id,
+            status=Task.Status.DONE,
+        )
+        self.assertEqual(self._counts(self.project), (0, 1, 0))
+        self.assertEqual(self._counts(self.other_project), (0, 0, 1))
+
+        comment = services.create_task_comment(organization=self.org, task_id=task.id, author=self.user, content='Hi')
+        services.create_task_comment(organization=self.org, task_id=task.id, author=self.user, content='Again')
+        services.delete_task_comment(organization=self.org, comment_id=comment.id)
+        task.refresh_from_db()
+        self.assertEqual(task.comment_count, 1)
+
+        services.delete_task(organization=self.org, task_id=task.id)
+        self.assertEqual(self._counts(self.other_project), (0, 0, 0))
+
+    def test_deletes_count_the_rows_their_update_changed(self):
+        task = services.create_task(organization=self.org, project_id=self.project.id, title='Task')
+        comment = services.create_task_comment(organization=self.org, task_id=task.id, author=self.user, content='Hi')
+
+        # No unlocked read ahead of the soft delete for a concurrent move to slip past.
+        with CaptureQueriesContext(connection) as ctx:
+            services.delete_task_comment(organization=self.org, comment_id=comment.id)
+            services.delete_task(organization=self.org, task_id=task.id)
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')])
+
+        with self.assertRaises(Task.DoesNotExist):
+            services.delete_task(organization=self.org, task_id=task.id)
+        result = services.bulk_delete_tasks(organization=self.org, task_ids=[task.id])
+        self.assertEqual(result.errors, [(0, task.id, 'Task not found')])
+        self.assertEqual(self._counts(self.project), (0, 0, 0))
+        self.assertEqual(Task.all_objects.get(id=task.id).comment_count, 0)
+
+    def test_recount_repairs_drift(self):
+        task = Task.objects.create(project=self.project, title='Created behind the services', status=Task.Status.DONE)
+        TaskComment.objects.create(task=task, author=self.user, content='Hi')
+        Project.objects.filter(id=self.other_project.id).update(todo_count=7)
+
+        call_command('recount', batch_size=1, stdout=io.StringIO())
+
+        self.assertEqual(self._counts(self.project), (0, 0, 1))
+        self.assertEqual(self._counts(self.other_project), (0, 0, 0))
+        task.refresh_from_db()
+        self.assertEqual(task.comment_count, 1)
+
+
+class OrganizationColumnTests(TestCase):
+    def test_tenant_filters_use_the_denormalized_column(self):
+        user = User.objects.create_user(email='user@example.com', password='password123')
+        org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        project = Project.objects.create(organization=org, name='Board')
+        task = Task.objects.create(project=project, title='Task')
+        comment = services.create_task_comment(organization=org, task_id=task.id, author=user, content='Hi')
+
+        self.assertEqual((task.organization_id, comment.organization_id), (org.id, org.id))
+        self.assertIn('"tasks_task"."organization_id" =', str(selectors.list_tasks(organization=org).query))
+        self.assertIn(
+            '"tasks_taskcomment"."organization_id" =',
+            str(selectors.list_task_comments(organization=org, task_id=task.id).query),
+        )
+
+    def test_saving_a_moved_task_moves_its_organization(self):
+        user = User.objects.create_user(email='user@example.com', password='password123')
+        org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        other_org = Organization.objects.create(name='Other', slug='other', contact_email='billing@other.com')
+        task = Task.objects.create(project=Project.objects.create(organization=org, name='Board'), title='Task')
+        comment = TaskComment.objects.create(task=task, author=user, content='Hi')
+
+        # What the admin change form does.
+        task.project = Project.objects.create(organization=other_org, name='Elsewhere')
+        task.save()
+
+        comment.refresh_from_db()
+        self.assertEqual((task.organization_id, comment.organization_id), (other_org.id, other_org.id))
+        self.assertEqual(list(selectors.list_tasks(organization=org)), [])
+        self.assertEqual(list(selectors.list_tasks(organization=other_org)), [task])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN plans are only checked on PostgreSQL')
+class SelectorIndexTests(TestCase):
+    PAGE = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(email='user@example.com', password='password123')
+        orgs = Organization.objects.bulk_create(
+            Organization(name=f'Org {i}', slug=f'org-{i}', contact_email=f'billing@org{i}.com') for i in range(2)
+        )
+        projects = Project.objects.bulk_create(
+            Project(organization=orgs[i % 2], name=f'Project {i}') for i in range(60)
+        )
+        tasks = Task.objects.bulk_create(
+            Task(
+                project=project,
+                organization=project.organization,
+                title=f'Task {i}',
+                status=Task.Status.values[i % 3],
+            )
+            for project in projects
+            for i in range(30)
+        )
+        TaskComment.objects.bulk_create(
+            TaskComment(task=task, organization=task.organization, author=user, content='Hi')
+            for task in tasks[:200]
+            for _ in range(5)
+        )
+        # Dead rows, which the partial indexes leave out.
+        Task.all_objects.filter(id__in=[task.id for task in tasks[::4]]).update(deleted_at=timezone.now())
+        cls.org, cls.project, cls.task = orgs[0], projects[0], tasks[1]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            # Tables this small would otherwise be read sequentially whatever indexes exist.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        return plan
+
+    def test_project_list_uses_the_partial_keyset_index(self):
+        queryset = project_selectors.list_projects(organization=self.org)[: self.PAGE]
+        self.assertUsesIndex(queryset, 'projects_alive_keyset_idx')
+
+    def test_task_selectors_use_partial_indexes(self):
+        self.assertUsesIndex(selectors.list_tasks(organization=self.org)[: self.PAGE], 'tasks_alive_org_keyset_idx')
+        self.assertUsesIndex(
+            selectors.list_tasks(organization=self.org, project_id=self.project.id)[: self.PAGE],
+            'tasks_alive_project_keyset_idx',
+        )
+        self.assertUsesIndex(
+            selectors._task_stat_rows(Task.objects.filter(project_id__in=[self.project.id]), 'project_id'),
+            'tasks_alive_project_status_idx',
+        )
+
+    def test_tenant_filters_read_the_organization_column_index(self):
+        # Neither list reaches the organization through projects or tasks any more.
+        with tenant_context(lambda: self.org.id):
+            tasks = selectors.list_tasks(organization=self.org)[: self.PAGE]
+            comments = TaskComment.objects.filter(organization=self.org).order_by()
+        for plan in (
+            self.assertUsesIndex(tasks, 'tasks_alive_org_keyset_idx'),
+            self.assertUsesIndex(comments, 'tasks_taskcomment_organization_id'),
+        ):
+            self.assertRegex(plan, r'Index Cond: \(.*organization_id = ')
+            self.assertNotIn('organizations_organization', plan)
+
+    def test_comment_list_uses_the_partial_keyset_index(self):
+        queryset = selectors.list_task_comments(organization=self.org, task_id=self.task.id)
+        self.assertUsesIndex(queryset.order_by('created_at', 'id')[: self.PAGE], 'comments_alive_keyset_idx')
+
+
+class TaskExportTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password='password123')
+        self.org = Organization.objects.create(name='Acme', slug='acme', contact_email='billing@acme.com')
+        OrganizationMember.objects.create(organization=self.org, user=self.user, role=OrganizationMember.Role.MEMBER)
+        self.project = Project.objects.create(organization=self.org, name='Board')
+        Task.objects.create(project=self.project, title='First, with a comma', due_date=datetime.date(2030, 1, 31))
+        Task.objects.create(project=self.project, title='Second')
+        self.headers = {
+            'HTTP_AUTHORIZATION': f'Bearer {create_access_token(user=self.user)}',
+            'HTTP_X_ORGANIZATION_ID': self.org.id,
+        }
+
+    def test_csv_export_streams_every_task(self):
+        response = self.client.get('/exports/tasks', **self.headers)
+
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(sorted(row['title'] for row in rows), ['First, with a comma', 'Second'])
+        self.assertEqual({row['project_name'] for row in rows}, {'Board'})
+
+    def test_ndjson_export_can_be_gzipped(self):
+        response = self.client.get('/exports/tasks', {'format': 'ndjson'}, HTTP_ACCEPT_ENCODING='gzip', **self.headers)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        due_dates = {json.loads(line)['title']: json.loads(line)['due_date'] for line in lines}
+        self.assertEqual(due_dates, {'First, with a comma': '2030-01-31', 'Second': None})
+
+    async def test_asgi_export_streams_from_an_async_iterator(self):
+        headers = {'Authorization': self.headers['HTTP_AUTHORIZATION'], 'X-Organization-ID': self.org.id}
+        response = await self.async_client.get('/exports/tasks', headers=headers)
+
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(sorted(row['title'] for row in rows), ['First, with a comma', 'Second'])
 
-# Create your tests here.
+    def test_export_requires_authentication(self):
+        self.assertEqual(self.client.get('/exports/tasks').status_code, 401)
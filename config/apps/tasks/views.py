@@ -1,3 +1,115 @@
-from django.shortcuts import render
+import csv
+import json
+import re
+from itertools import islice
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from django.views.decorators.http import require_GET
+
+from apps.organizations.models import OrganizationMember
+from apps.organizations.selectors import require_permission
+
+from . import selectors
+
+
+EXPORT_COLUMNS = {
+    'id': 'id',
+    'project_id': 'project_id',
+    'project_name': 'project__name',
+    'title': 'title',
+    'description': 'description',
+    'status': 'status',
+    'due_date': 'due_date',
+    'assignee_email': 'assignee_email',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+ROWS_PER_CHUNK = 500
+
+_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+@require_GET
+def export_tasks(request):
+    if getattr(request, 'auth_error', None) or not getattr(request, 'jwt_payload', None):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if getattr(request, 'org_error', None):
+        return JsonResponse({'error': 'Invalid organization'}, status=403)
+
+    membership = getattr(request, 'membership', None)
+    if not membership:
+        return JsonResponse({'error': 'X-Organization-ID header required'}, status=400)
+    try:
+        require_permission(membership=membership, permission=OrganizationMember.Permission.TASKS_READ)
+    except PermissionDenied as exc:
+        return JsonResponse({'error': str(exc)}, status=403)
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f'format must be one of: {", ".join(EXPORT_FORMATS)}'}, status=400)
+
+    rows = (
+        selectors.list_tasks(organization=request.active_organization, project_id=request.GET.get('project_id'))
+        .values_list(*EXPORT_COLUMNS.values())
+        # Server-side cursor on PostgreSQL: only one chunk of rows is held in memory at a time.
+        .iterator(chunk_size=settings.TASKS_EXPORT_CHUNK_SIZE)
+    )
+    content = _csv_chunks(rows) if export_format == 'csv' else _ndjson_chunks(rows)
+
+    gzip = bool(_accepts_gzip.search(request.headers.get('Accept-Encoding', '')))
+    if gzip:
+        content = compress_sequence(content)
+    if isinstance(request, ASGIRequest):
+        # ASGI buffers a synchronous iterator into a list before sending it; pull chunks one at a time instead.
+        content = _iterate_async(content)
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+    if gzip:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding', 'Authorization', 'X-Organization-ID'))
+    return response
+
+
+class _Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+def _csv_chunks(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS.keys()).encode()
+    for chunk in _chunked(rows):
+        yield ''.join(writer.writerow(row) for row in chunk).encode()
+
+
+def _ndjson_chunks(rows):
+    columns = tuple(EXPORT_COLUMNS)
+    for chunk in _chunked(rows):
+        yield ''.join(json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n' for row in chunk).encode()
+
+
+def _chunked(rows):
+    rows = iter(rows)
+    while chunk := list(islice(rows, ROWS_PER_CHUNK)):
+        yield chunk
+
+
+async def _iterate_async(chunks):
+    # Thread-sensitive, so every chunk is fetched on the thread (and connection) that opened the cursor.
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
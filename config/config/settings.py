@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import json
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -105,6 +107,49 @@ DATABASES = {
 AUTH_USER_MODEL = 'accounts.User'
 
 
+# Caches
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+# GraphQL responses and the per-organization data versions that invalidate them.
+# Use django.core.cache.backends.filebased.FileBasedCache with a shared LOCATION
+# to share entries between worker processes without an external service.
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+RESPONSE_CACHE_LOCATION = os.environ.get('RESPONSE_CACHE_LOCATION', 'pms-responses')
+RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', '60'))
+
+# Invalidation counters for cached organization memberships. Every worker must
+# read the same counters, so production deployments must point this at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache); the in-process
+# default is only correct with a single worker process.
+VERSIONS_CACHE_ALIAS = 'versions'
+VERSIONS_CACHE_BACKEND = os.environ.get('VERSIONS_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+VERSIONS_CACHE_LOCATION = os.environ.get('VERSIONS_CACHE_LOCATION', 'pms-versions')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    VERSIONS_CACHE_ALIAS: {
+        'BACKEND': VERSIONS_CACHE_BACKEND,
+        'LOCATION': VERSIONS_CACHE_LOCATION,
+        # Counters never expire: a lost counter is reseeded, which invalidates every entry depending on it.
+        'TIMEOUT': None,
+    },
+    RESPONSE_CACHE_ALIAS: {
+        'BACKEND': RESPONSE_CACHE_BACKEND,
+        'LOCATION': RESPONSE_CACHE_LOCATION,
+        'TIMEOUT': RESPONSE_CACHE_TTL_SECONDS,
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '10000'))},
+    },
+}
+if VERSIONS_CACHE_BACKEND.endswith('LocMemCache'):
+    # LocMemCache culls at 300 entries by default, which would keep reseeding live counters.
+    CACHES[VERSIONS_CACHE_ALIAS]['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('VERSIONS_CACHE_MAX_ENTRIES', '100000')),
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -144,8 +189,68 @@ STATIC_URL = 'static/'
 
 JWT_SECRET = os.environ.get('JWT_SECRET', SECRET_KEY)
 JWT_ACCESS_TOKEN_TTL_SECONDS = int(os.environ.get('JWT_ACCESS_TOKEN_TTL_SECONDS', '86400'))
+JWT_ORGANIZATION_TOKEN_TTL_SECONDS = int(os.environ.get('JWT_ORGANIZATION_TOKEN_TTL_SECONDS', '900'))
+JWT_TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('JWT_TOKEN_CACHE_MAX_ENTRIES', '10000'))
+JWT_TOKEN_CACHE_TTL_SECONDS = int(os.environ.get('JWT_TOKEN_CACHE_TTL_SECONDS', '300'))
+JWT_REVOCATION_REFRESH_SECONDS = int(os.environ.get('JWT_REVOCATION_REFRESH_SECONDS', '5'))
+JWT_REVOCATION_BLOOM_CAPACITY = int(os.environ.get('JWT_REVOCATION_BLOOM_CAPACITY', '100000'))
+JWT_REVOCATION_BLOOM_ERROR_RATE = float(os.environ.get('JWT_REVOCATION_BLOOM_ERROR_RATE', '0.001'))
+
+ORGANIZATION_MEMBERSHIP_CACHE_MAX_ENTRIES = int(os.environ.get('ORGANIZATION_MEMBERSHIP_CACHE_MAX_ENTRIES', '10000'))
+ORGANIZATION_MEMBERSHIP_CACHE_TTL_SECONDS = int(os.environ.get('ORGANIZATION_MEMBERSHIP_CACHE_TTL_SECONDS', '30'))
 
 
 GRAPHENE = {
     'SCHEMA': 'apps.api.schema.schema',
 }
+
+GRAPHQL_MAX_PAGE_SIZE = int(os.environ.get('GRAPHQL_MAX_PAGE_SIZE', '100'))
+GRAPHQL_MAX_BATCH_SIZE = int(os.environ.get('GRAPHQL_MAX_BATCH_SIZE', '10'))
+GRAPHQL_MAX_QUERY_DEPTH = int(os.environ.get('GRAPHQL_MAX_QUERY_DEPTH', '10'))
+GRAPHQL_MAX_QUERY_COST = int(os.environ.get('GRAPHQL_MAX_QUERY_COST', '5000'))
+# JSON object mapping organization ids to their query cost budget, e.g. {"<org id>": 20000}.
+GRAPHQL_ORGANIZATION_COST_BUDGETS = json.loads(os.environ.get('GRAPHQL_ORGANIZATION_COST_BUDGETS', '{}'))
+# Cost of individual fields, keyed "<schema type>.<field>", in place of the default of 1 per
+# object/list field and 0 per scalar. GRAPHQL_FIELD_COSTS (JSON, same shape) adds to or overrides these.
+GRAPHQL_FIELD_COSTS = {
+    'Query.taskStats': 10,
+    'Query.organizationTaskStats': 25,
+    'ProjectType.taskStats': 5,
+    'Mutation.bulkCreateTasks': 100,
+    'Mutation.bulkUpdateTasks': 100,
+    'Mutation.bulkDeleteTasks': 50,
+    **json.loads(os.environ.get('GRAPHQL_FIELD_COSTS', '{}')),
+}
+GRAPHQL_DOCUMENT_CACHE_MAX_ENTRIES = int(os.environ.get('GRAPHQL_DOCUMENT_CACHE_MAX_ENTRIES', '500'))
+GRAPHQL_PERSISTED_QUERY_TTL_SECONDS = int(os.environ.get('GRAPHQL_PERSISTED_QUERY_TTL_SECONDS', '604800'))
+# Path to a JSON list of operation documents clients may send by sha256 without registering them.
+GRAPHQL_ALLOWLIST_PATH = os.environ.get('GRAPHQL_ALLOWLIST_PATH', '')
+# When enabled, only documents from GRAPHQL_ALLOWLIST_PATH are executed.
+GRAPHQL_ALLOWLIST_ONLY = os.environ.get('GRAPHQL_ALLOWLIST_ONLY', 'false').lower() in {'1', 'true', 'yes', 'on'}
+
+# JSON object mapping organization ids to a tier name used as a metrics label; unlisted organizations are "standard".
+ORGANIZATION_TIERS = json.loads(os.environ.get('ORGANIZATION_TIERS', '{}'))
+
+# Fraction of GraphQL operations that record per-field and database timings (0 disables them).
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '0'))
+METRICS_MAX_LABEL_SETS = int(os.environ.get('METRICS_MAX_LABEL_SETS', '500'))
+# /metrics requires "Authorization: Bearer <METRICS_TOKEN>" and is disabled while this is unset.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# "raise" fails GraphQL operations that exceed a resolver's @query_budget or repeat one SQL
+# statement QUERY_BUDGET_REPEAT_THRESHOLD times; "log" only warns; "off" disables capture.
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'raise' if DEBUG or sys.argv[1:2] == ['test'] else 'log')
+QUERY_BUDGET_REPEAT_THRESHOLD = int(os.environ.get('QUERY_BUDGET_REPEAT_THRESHOLD', '3'))
+
+TASKS_BULK_MAX_ITEMS = int(os.environ.get('TASKS_BULK_MAX_ITEMS', '500'))
+TASKS_EXPORT_CHUNK_SIZE = int(os.environ.get('TASKS_EXPORT_CHUNK_SIZE', '2000'))
+
+# "local" delivers task events to subscribers in the publishing process only; "postgres" relays
+# them through LISTEN/NOTIFY on the default database so every ASGI worker receives them.
+SUBSCRIPTIONS_BACKEND = os.environ.get('SUBSCRIPTIONS_BACKEND', 'local')
+SUBSCRIPTIONS_QUEUE_SIZE = int(os.environ.get('SUBSCRIPTIONS_QUEUE_SIZE', '100'))
+SUBSCRIPTIONS_CONNECTION_INIT_TIMEOUT_SECONDS = int(
+    os.environ.get('SUBSCRIPTIONS_CONNECTION_INIT_TIMEOUT_SECONDS', '10')
+)
+# How long a WebSocket connection's token and membership checks are trusted before the next event re-runs them.
+SUBSCRIPTIONS_AUTH_RECHECK_SECONDS = int(os.environ.get('SUBSCRIPTIONS_AUTH_RECHECK_SECONDS', '30'))
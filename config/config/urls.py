@@ -18,14 +18,19 @@ from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
 
-from apps.api.graphql_middleware import AuthRequiredMiddleware
+from apps.api.graphql_middleware import AuthRequiredMiddleware, LoaderMiddleware
+from apps.api.metrics import MetricsMiddleware
+from apps.api.query_budget import QueryBudgetMiddleware
+from apps.api.views import PMSGraphQLView
+from apps.core.views import metrics
+from apps.tasks.views import export_tasks
 
 graphql_view = csrf_exempt(
-    GraphQLView.as_view(
+    PMSGraphQLView.as_view(
         graphiql=settings.DEBUG,
-        middleware=[AuthRequiredMiddleware()],
+        # graphql-core wraps resolvers so the last middleware listed runs outermost.
+        middleware=[QueryBudgetMiddleware(), AuthRequiredMiddleware(), LoaderMiddleware(), MetricsMiddleware()],
     )
 )
 
@@ -33,4 +38,6 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('graphql', graphql_view),
     path('graphql/', graphql_view),
+    path('metrics', metrics),
+    path('exports/tasks', export_tasks),
 ]